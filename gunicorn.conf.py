@@ -0,0 +1,40 @@
+## /home/developer/SDI_process/gunicorn.conf.py
+## Production server:  gunicorn -c gunicorn.conf.py wsgi:app
+## Every setting can be changed through the SDI_* environment variables below.
+
+import os
+
+bind = os.getenv("SDI_BIND", "0.0.0.0:8003")
+
+## Worker processes, each with its own request threads (gthread worker)
+workers = int(os.getenv("SDI_WORKERS", str(min(4, 2 * (os.cpu_count() or 1)))))
+threads = int(os.getenv("SDI_THREADS", "4"))
+worker_class = "gthread"
+
+## Import the app (pandas, openpyxl, the Planon template, warmed caches) once in the
+## master; the workers share those pages copy-on-write (see wsgi.py)
+preload_app = True
+
+## Large exports run as background jobs, but single-package exports still render inline
+timeout = int(os.getenv("SDI_WORKER_TIMEOUT", "120"))
+graceful_timeout = 30
+keepalive = 5
+
+## Recycle workers now and then so memory they copied from the master is given back
+max_requests = int(os.getenv("SDI_MAX_REQUESTS", "2000"))
+max_requests_jitter = max_requests // 10
+
+## The app prints its own JSON request log (SDI_REQUEST_LOG); gunicorn only logs errors
+accesslog = os.getenv("SDI_ACCESS_LOG") or None
+errorlog = "-"
+loglevel = os.getenv("SDI_LOG_LEVEL", "info")
+
+
+def post_fork(server, worker):
+    # The connection pool, the export job threads, the Planon process pool and the
+    # cache's probe connection all notice the new PID and start fresh on first use;
+    # only the metrics are reset here, so each worker reports its own numbers.
+    import app as sdi_app
+
+    sdi_app.metrics.reset()
+    server.log.info(f"[WORKER] {worker.pid} ready")
@@ -0,0 +1,254 @@
+## /home/developer/SDI_process/planon_export.py
+
+import atexit
+import math
+import multiprocessing
+import os
+import posixpath
+import re
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from io import BytesIO
+from typing import Dict, IO, Iterable, Iterator, List, Optional, Sequence, Tuple
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape
+
+from sdi_lazy import lazy_import
+
+# Only the template parsing needs openpyxl; the exports themselves write XML directly.
+openpyxl = lazy_import("openpyxl")
+
+# Row 9 of the Planon template holds the labels; data starts on row 10.
+HEADER_ROW = 9
+START_ROW = HEADER_ROW + 1
+
+_NS = {
+    "main": "http://schemas.openxmlformats.org/spreadsheetml/2006/main",
+    "rel": "http://schemas.openxmlformats.org/package/2006/relationships",
+}
+_R_ID = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id"
+_ROW_RE = re.compile(r"<row\b[^>]*?(?:/>|>.*?</row>)", re.S)
+_ROW_NUM_RE = re.compile(r'\br="(\d+)"')
+_DIMENSION_RE = re.compile(r'<dimension ref="([A-Z]+\d+)(?::([A-Z]+)\d+)?"\s*/>')
+_ILLEGAL_XML_RE = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+def _normalize_name(text: str) -> str:
+    s = "" if text is None else str(text)
+    s = re.sub(r"[^0-9a-zA-Z]+", " ", s).strip().lower()
+    return re.sub(r"\s+", " ", s)
+
+
+def _column_letter(col_idx: int) -> str:
+    letters = ""
+    while col_idx:
+        col_idx, rem = divmod(col_idx - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
+def _cell_xml(ref: str, value) -> str:
+    """XML for one cell, or "" for blanks (which are simply not written)."""
+    if value is None:
+        return ""
+    if hasattr(value, "item") and not isinstance(value, (str, bytes)):
+        value = value.item()  # numpy scalar -> Python scalar
+    if isinstance(value, bool):
+        return f'<c r="{ref}" t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float)):
+        if isinstance(value, float) and (math.isnan(value) or math.isinf(value)):
+            return ""
+        return f'<c r="{ref}"><v>{value!r}</v></c>'
+    text = _ILLEGAL_XML_RE.sub("", str(value))
+    if not text:
+        return ""
+    return f'<c r="{ref}" t="inlineStr"><is><t xml:space="preserve">{escape(text)}</t></is></c>'
+
+
+class PlanonTemplate:
+    """The Planon import template, parsed once and reused for every export.
+
+    Exports copy the template package as-is and stream the data rows straight
+    into the worksheet XML after the header row, so no openpyxl cell objects
+    are created per value.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self.data = f.read()
+        self.sheet_part = self._active_sheet_part()
+        self.headers = self._read_headers()
+        self._mappings: Dict[Tuple[str, ...], Dict[int, str]] = {}
+
+    def _active_sheet_part(self) -> str:
+        with zipfile.ZipFile(self._open()) as z:
+            workbook = ElementTree.fromstring(z.read("xl/workbook.xml"))
+            rels = ElementTree.fromstring(z.read("xl/_rels/workbook.xml.rels"))
+        view = workbook.find("main:bookViews/main:workbookView", _NS)
+        active = int(view.get("activeTab", 0)) if view is not None else 0
+        sheets = workbook.findall("main:sheets/main:sheet", _NS)
+        rel_id = sheets[active].get(_R_ID)
+        target = next(r.get("Target") for r in rels.findall("rel:Relationship", _NS) if r.get("Id") == rel_id)
+        if target.startswith("/"):
+            return target.lstrip("/")
+        return posixpath.normpath(posixpath.join("xl", target))
+
+    def _read_headers(self) -> Dict[int, str]:
+        wb = openpyxl.load_workbook(self._open(), read_only=True)
+        try:
+            ws = wb.active
+            row = next(ws.iter_rows(min_row=HEADER_ROW, max_row=HEADER_ROW, values_only=True), ())
+            return {idx: _normalize_name(val) for idx, val in enumerate(row, start=1) if val is not None}
+        finally:
+            wb.close()
+
+    def _open(self) -> IO[bytes]:
+        return BytesIO(self.data)
+
+    def column_mapping(self, columns: Sequence[str]) -> Dict[int, str]:
+        """Template column index -> data column, matched on normalized labels."""
+        key = tuple(columns)
+        mapping = self._mappings.get(key)
+        if mapping is None:
+            norm_cols = {_normalize_name(c): c for c in columns}
+            mapping = {idx: norm_cols[h] for idx, h in self.headers.items() if h in norm_cols}
+            self._mappings[key] = mapping
+        return mapping
+
+    def write(self, out: IO[bytes], mapping: Dict[int, str], rows: Iterable[Sequence], n_rows: int = None):
+        """Write a workbook to ``out``; each row holds values in ``mapping`` order.
+
+        ``n_rows`` lets the sheet dimension be written up front; without it the
+        (optional) dimension element is dropped and readers compute it.
+        """
+        letters = [_column_letter(idx) for idx in mapping]
+        with zipfile.ZipFile(self._open()) as src, \
+                zipfile.ZipFile(out, "w", compression=zipfile.ZIP_DEFLATED) as dst:
+            for item in src.infolist():
+                if item.filename == self.sheet_part:
+                    with dst.open(item.filename, "w", force_zip64=True) as f:
+                        xml = src.read(item.filename).decode("utf-8")
+                        self._write_sheet(f, xml, letters, rows, n_rows)
+                else:
+                    dst.writestr(item, src.read(item.filename))
+
+    def _write_sheet(self, f: IO[bytes], xml: str, letters: List[str], rows: Iterable[Sequence], n_rows: int):
+        start = xml.find("<sheetData")
+        if start < 0:
+            raise ValueError("The template worksheet has no <sheetData> element.")
+        open_end = xml.index(">", start) + 1
+        if xml[open_end - 2] == "/":
+            # <sheetData/>: nothing to keep.
+            body, close_start, close_end = "", open_end, open_end
+        else:
+            close_start = xml.index("</sheetData>", open_end)
+            close_end = close_start + len("</sheetData>")
+            body = xml[open_end:close_start]
+
+        # Keep the rows up to the header; anything below it is replaced by the data.
+        kept = [m.group(0) for m in _ROW_RE.finditer(body)
+                if int(_ROW_NUM_RE.search(m.group(0)).group(1)) <= HEADER_ROW]
+
+        head = xml[:start]
+        if n_rows is None:
+            head = _DIMENSION_RE.sub("", head)
+        else:
+            last_row = HEADER_ROW + n_rows
+            head = _DIMENSION_RE.sub(
+                lambda m: f'<dimension ref="{m.group(1)}:{m.group(2) or m.group(1).rstrip("0123456789")}{last_row}"/>',
+                head,
+            )
+        f.write(head.encode("utf-8"))
+        f.write(b"<sheetData>")
+        f.write("".join(kept).encode("utf-8"))
+        chunk: List[str] = []
+        for r, row in enumerate(rows, start=START_ROW):
+            cells = "".join(_cell_xml(f"{letter}{r}", val) for letter, val in zip(letters, row))
+            chunk.append(f'<row r="{r}">{cells}</row>')
+            if len(chunk) >= 500:
+                f.write("".join(chunk).encode("utf-8"))
+                chunk = []
+        f.write("".join(chunk).encode("utf-8"))
+        f.write(b"</sheetData>")
+        f.write(xml[close_end:].encode("utf-8"))
+
+
+_templates: Dict[str, Tuple[tuple, PlanonTemplate]] = {}
+_templates_lock = threading.Lock()
+
+
+def load_template(path: str) -> PlanonTemplate:
+    """Return the parsed template, re-reading it only when the file changes."""
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Template not found: {path}")
+    st = os.stat(path)
+    stamp = (st.st_mtime_ns, st.st_size)
+    with _templates_lock:
+        cached = _templates.get(path)
+        if cached is None or cached[0] != stamp:
+            cached = (stamp, PlanonTemplate(path))
+            _templates[path] = cached
+        return cached[1]
+
+
+def render_workbook(path: str, mapping: Dict[int, str], rows: List[Sequence]) -> bytes:
+    """The workbook for ``rows`` as bytes; module level so a process pool can run it."""
+    buffer = BytesIO()
+    load_template(path).write(buffer, mapping, rows, n_rows=len(rows))
+    return buffer.getvalue()
+
+
+# Workers are spawned, never forked: a fork of a threaded (gunicorn gthread)
+# worker copies locks other threads may be holding and can deadlock the child.
+# Spawned workers re-import the main module, so scripts running exports must
+# guard their entry point with ``if __name__ == "__main__"`` (app.py does).
+_mp_context = multiprocessing.get_context("spawn")
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_key: Optional[Tuple[int, int]] = None  # (pid, max_workers)
+_pool_lock = threading.Lock()
+
+
+def _get_pool(max_workers: int) -> ProcessPoolExecutor:
+    global _pool, _pool_key
+    key = (os.getpid(), max_workers)
+    with _pool_lock:
+        if _pool is None or _pool_key != key:
+            # A pool inherited through fork belongs to the parent and is left alone;
+            # one of another size is retired once its submitted workbooks are done.
+            if _pool is not None and _pool_key[0] == os.getpid():
+                _pool.shutdown(wait=False)
+            _pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=_mp_context)
+            _pool_key = key
+        return _pool
+
+
+def shutdown_pool():
+    """Stop the workbook worker processes of this process (also run at exit)."""
+    global _pool, _pool_key
+    with _pool_lock:
+        if _pool is not None and _pool_key[0] == os.getpid():
+            _pool.shutdown(wait=True, cancel_futures=True)
+        _pool, _pool_key = None, None
+
+
+atexit.register(shutdown_pool)
+
+
+def render_workbooks(path: str, jobs: Dict[str, Tuple[Dict[int, str], List[Sequence]]],
+                     max_workers: int = 2) -> Iterator[Tuple[str, bytes]]:
+    """Render ``{name: (mapping, rows)}`` in worker processes, yielding (name, bytes) as each finishes.
+
+    Rows must be plain lists of picklable values. A single workbook is
+    rendered in this process, where the pool would only add overhead.
+    """
+    if len(jobs) <= 1 or max_workers <= 1:
+        for name, (mapping, rows) in jobs.items():
+            yield name, render_workbook(path, mapping, rows)
+        return
+    pool = _get_pool(max_workers)
+    futures = {pool.submit(render_workbook, path, mapping, rows): name for name, (mapping, rows) in jobs.items()}
+    for future in as_completed(futures):
+        yield futures[future], future.result()
@@ -0,0 +1,262 @@
+## /home/developer/SDI_process/sdi_assets.py
+
+import hashlib
+import json
+import os
+import posixpath
+import re
+import urllib.request
+from typing import Dict, List, Optional
+
+from flask import request, url_for
+
+# Third-party files kept under static/vendor, with the upstream release they come from.
+VENDOR: Dict[str, str] = {
+    "jquery/jquery.min.js": "https://code.jquery.com/jquery-3.7.1.min.js",
+    "bootstrap/bootstrap.min.css": "https://cdn.jsdelivr.net/npm/bootstrap@5.3.3/dist/css/bootstrap.min.css",
+    "bootstrap/bootstrap.bundle.min.js": "https://cdn.jsdelivr.net/npm/bootstrap@5.3.3/dist/js/bootstrap.bundle.min.js",
+    "bootstrap-icons/bootstrap-icons.min.css":
+        "https://cdn.jsdelivr.net/npm/bootstrap-icons@1.11.3/font/bootstrap-icons.min.css",
+    "bootstrap-icons/fonts/bootstrap-icons.woff2":
+        "https://cdn.jsdelivr.net/npm/bootstrap-icons@1.11.3/font/fonts/bootstrap-icons.woff2",
+    "bootstrap-icons/fonts/bootstrap-icons.woff":
+        "https://cdn.jsdelivr.net/npm/bootstrap-icons@1.11.3/font/fonts/bootstrap-icons.woff",
+    "datatables/jquery.dataTables.min.js": "https://cdn.datatables.net/1.13.6/js/jquery.dataTables.min.js",
+    "datatables/dataTables.bootstrap5.min.js": "https://cdn.datatables.net/1.13.6/js/dataTables.bootstrap5.min.js",
+    "datatables/dataTables.bootstrap5.min.css": "https://cdn.datatables.net/1.13.6/css/dataTables.bootstrap5.min.css",
+}
+
+# Bundle name -> files (relative to the static folder) concatenated in this order.
+BUNDLES: Dict[str, List[str]] = {
+    "vendor.css": [
+        "vendor/bootstrap/bootstrap.min.css",
+        "vendor/bootstrap-icons/bootstrap-icons.min.css",
+        "vendor/datatables/dataTables.bootstrap5.min.css",
+    ],
+    "vendor.js": [
+        "vendor/jquery/jquery.min.js",
+        "vendor/bootstrap/bootstrap.bundle.min.js",
+        "vendor/datatables/jquery.dataTables.min.js",
+        "vendor/datatables/dataTables.bootstrap5.min.js",
+    ],
+    "style.css": ["style.css"],
+}
+# Files fingerprinted as they are (images referenced from the templates).
+FILES: List[str] = ["logos/ubc_logo.jpg", "logos/ubc-facilities_logo.jpg"]
+
+DIST_DIR = "dist"
+MANIFEST_NAME = "manifest.json"
+# Fingerprinted files never change, so browsers may keep them for a year without asking.
+IMMUTABLE_CACHE_SECONDS = 365 * 24 * 3600
+
+_CSS_URL = re.compile(r"""url\(\s*(['"]?)([^'")]+)\1\s*\)""")
+# Source maps are not vendored, and their paths would be wrong inside a bundle anyway.
+_SOURCE_MAP = re.compile(rb"\n?(?:/\*# sourceMappingURL=[^*]*\*/|//# sourceMappingURL=\S*)\s*$")
+
+
+def _fingerprint(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:12]
+
+
+def _hashed_name(name: str, data: bytes) -> str:
+    stem, ext = posixpath.splitext(name)
+    return f"{stem}.{_fingerprint(data)}{ext}"
+
+
+def minify_css(text: str) -> str:
+    """Drop comments (except /*! licenses) and the whitespace CSS does not need."""
+    text = re.sub(r"/\*(?!!).*?\*/", "", text, flags=re.S)
+    text = re.sub(r"\s+", " ", text)
+    text = re.sub(r"\s*([{};,>])\s*", r"\1", text)
+    text = re.sub(r"([{;])\s*([-\w]+)\s*:\s*", r"\1\2:", text)
+    return text.replace(";}", "}").strip()
+
+
+def fetch_vendor(static_dir: str, force: bool = False) -> List[str]:
+    """Download the VENDOR files missing from static/vendor (all of them with ``force``)."""
+    fetched = []
+    for name, url in VENDOR.items():
+        path = os.path.join(static_dir, "vendor", *name.split("/"))
+        if os.path.exists(path) and not force:
+            continue
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with urllib.request.urlopen(url, timeout=60) as response:
+            data = response.read()
+        with open(path, "wb") as f:
+            f.write(data)
+        fetched.append(name)
+    return fetched
+
+
+def _read(static_dir: str, name: str) -> bytes:
+    with open(os.path.join(static_dir, *name.split("/")), "rb") as f:
+        return f.read()
+
+
+def _read_source(static_dir: str, name: str) -> bytes:
+    return _SOURCE_MAP.sub(b"", _read(static_dir, name).rstrip())
+
+
+def _write(static_dir: str, name: str, data: bytes):
+    path = os.path.join(static_dir, *name.split("/"))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _bundle_css(static_dir: str, name: str, written: List[str]) -> str:
+    """One CSS file with its url() references copied to dist/ under fingerprinted names."""
+    base_dir = posixpath.dirname(name)
+
+    def rewrite(match):
+        target = match.group(2)
+        if re.match(r"^(data:|[a-z]+://|/|#)", target):
+            return match.group(0)
+        path = target.split("?", 1)[0].split("#", 1)[0]
+        source = posixpath.normpath(posixpath.join(base_dir, path))
+        data = _read(static_dir, source)
+        hashed = posixpath.join(DIST_DIR, "files", _hashed_name(posixpath.basename(source), data))
+        _write(static_dir, hashed, data)
+        written.append(hashed)
+        # Bundles sit directly in dist/, so the files are one folder down.
+        return f'url("{posixpath.relpath(hashed, DIST_DIR)}")'
+
+    text = _read_source(static_dir, name).decode("utf-8")
+    if not name.endswith(".min.css"):
+        text = minify_css(text)
+    return _CSS_URL.sub(rewrite, text)
+
+
+def build_assets(static_dir: str) -> Dict[str, str]:
+    """Concatenate and minify BUNDLES, copy FILES, fingerprint both under static/dist and write the manifest.
+
+    Returns the manifest (bundle or file name -> path relative to the static folder).
+    Files left over from earlier builds are removed.
+    """
+    missing = [name for name in _source_names()
+               if not os.path.exists(os.path.join(static_dir, *name.split("/")))]
+    if missing:
+        raise FileNotFoundError(f"Missing static files (fetch the vendor files first): {', '.join(missing)}")
+
+    manifest, written = {}, []
+    for bundle, files in BUNDLES.items():
+        if bundle.endswith(".css"):
+            parts = [_bundle_css(static_dir, name, written) for name in files]
+            data = "\n".join(parts).encode("utf-8")
+        else:
+            # Vendor scripts are minified upstream; ";" guards against files missing a final semicolon.
+            data = b"\n;".join(_read_source(static_dir, name) for name in files) + b"\n"
+        hashed = posixpath.join(DIST_DIR, _hashed_name(bundle, data))
+        _write(static_dir, hashed, data)
+        written.append(hashed)
+        manifest[bundle] = hashed
+
+    for name in FILES:
+        data = _read(static_dir, name)
+        hashed = posixpath.join(DIST_DIR, _hashed_name(name, data))
+        _write(static_dir, hashed, data)
+        written.append(hashed)
+        manifest[name] = hashed
+
+    _write(static_dir, posixpath.join(DIST_DIR, MANIFEST_NAME),
+           json.dumps(manifest, indent=2, sort_keys=True).encode("utf-8"))
+
+    keep = {os.path.join(static_dir, *name.split("/")) for name in written}
+    keep.add(os.path.join(static_dir, DIST_DIR, MANIFEST_NAME))
+    for root, _, names in os.walk(os.path.join(static_dir, DIST_DIR)):
+        for file_name in names:
+            path = os.path.join(root, file_name)
+            if path not in keep:
+                os.remove(path)
+    return manifest
+
+
+def _source_names() -> List[str]:
+    return [name for files in [*BUNDLES.values(), FILES] for name in files]
+
+
+def ensure_assets(static_dir: str) -> Optional[Dict[str, str]]:
+    """Build the bundles unless the manifest is newer than every source file.
+
+    Called at startup so a deploy that skipped ``flask build-assets`` still
+    serves the self-hosted files. Returns the manifest, or None (after printing
+    an error) when the build is not possible.
+    """
+    manifest_path = os.path.join(static_dir, DIST_DIR, MANIFEST_NAME)
+    try:
+        built = os.stat(manifest_path).st_mtime_ns
+        sources = [os.stat(os.path.join(static_dir, *name.split("/"))).st_mtime_ns for name in _source_names()]
+        if max(sources) <= built:
+            with open(manifest_path, encoding="utf-8") as f:
+                return json.load(f)
+    except (OSError, ValueError):
+        pass
+    try:
+        return build_assets(static_dir)
+    except OSError as e:
+        print(f"[ERROR] in ensure_assets: the static bundles could not be built, pages will load "
+              f"jQuery, Bootstrap and DataTables from public CDNs: {repr(e)}")
+        # An older build would be missing whatever changed since; the CDN files at least match.
+        try:
+            os.remove(manifest_path)
+        except OSError:
+            pass
+        return None
+
+
+class Assets:
+    """Serves the bundles listed in static/dist/manifest.json.
+
+    Templates call ``asset_url("vendor.css")``, which returns the
+    fingerprinted URL, or None while there is no build (the templates then
+    fall back to the CDN files, and a warning is printed once). Responses for
+    dist/ files are marked immutable.
+    """
+
+    def __init__(self, static_dir: str):
+        self.static_dir = static_dir
+        self.manifest_path = os.path.join(static_dir, DIST_DIR, MANIFEST_NAME)
+        self._manifest: Dict[str, str] = {}
+        self._manifest_mtime = None
+        self._warned = False
+
+    def init_app(self, app):
+        app.jinja_env.globals["asset_url"] = self.url
+        app.after_request(self._after_request)
+
+    def manifest(self) -> Dict[str, str]:
+        """The current manifest, re-read when a build has replaced it."""
+        try:
+            mtime = os.stat(self.manifest_path).st_mtime_ns
+        except OSError:
+            self._manifest, self._manifest_mtime = {}, None
+            return self._manifest
+        if mtime != self._manifest_mtime:
+            try:
+                with open(self.manifest_path, encoding="utf-8") as f:
+                    self._manifest = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"[WARNING] in Assets: could not read {self.manifest_path}: {repr(e)}")
+                self._manifest = {}
+            self._manifest_mtime = mtime
+        return self._manifest
+
+    def url(self, bundle: str) -> Optional[str]:
+        path = self.manifest().get(bundle)
+        if path is None and not self._warned:
+            self._warned = True
+            print(f"[WARNING] in Assets: no build of {bundle} in {self.manifest_path}; pages fall back "
+                  f"to the public CDNs (run `flask build-assets`)")
+        return url_for("static", filename=path) if path else None
+
+    def _after_request(self, response):
+        filename = (request.view_args or {}).get("filename", "")
+        if (request.endpoint == "static" and filename.startswith(f"{DIST_DIR}/")
+                and filename != f"{DIST_DIR}/{MANIFEST_NAME}" and response.status_code == 200):
+            response.cache_control.public = True
+            response.cache_control.max_age = IMMUTABLE_CACHE_SECONDS
+            response.cache_control.immutable = True
+            response.cache_control.no_cache = None
+        return response
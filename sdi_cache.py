@@ -0,0 +1,227 @@
+## /home/developer/SDI_process/sdi_cache.py
+
+import functools
+import inspect
+import os
+import pathlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+from sdi_lazy import lazy_import
+
+pd = lazy_import("pandas")
+
+
+def _is_frame(value: Any) -> bool:
+    # Checks the type's module first so caching a list never imports pandas.
+    return type(value).__module__.startswith("pandas") and isinstance(value, pd.DataFrame)
+
+
+def _sizeof(value: Any) -> int:
+    """Approximate memory footprint of a cached value, in bytes."""
+    if _is_frame(value):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, (list, tuple, set, dict)):
+        return 128 * (len(value) + 1)
+    return 128
+
+
+def _copy_on_write() -> bool:
+    """True when pandas copies shared data lazily on the first write."""
+    if int(pd.__version__.split(".")[0]) >= 3:
+        return True
+    return getattr(pd.options.mode, "copy_on_write", False) is True
+
+
+def _clone(value: Any) -> Any:
+    """Hand out copies so callers can mutate results without touching the cache.
+
+    With copy-on-write a shallow copy is enough: the data is only duplicated
+    if the caller actually modifies it.
+    """
+    if _is_frame(value):
+        return value.copy(deep=not _copy_on_write())
+    if isinstance(value, list):
+        return [dict(v) if isinstance(v, dict) else v for v in value]
+    if isinstance(value, (set, dict)):
+        return value.copy()
+    return value
+
+
+class DatasetCache:
+    """Bounded LRU cache for results read from a SQLite database.
+
+    Entries are dropped as soon as the database changes, detected through
+    ``PRAGMA data_version`` on a dedicated read-only connection and through the
+    database/WAL file stats. Writers in this process also call ``invalidate()``
+    explicitly after committing.
+    """
+
+    def __init__(self, db_path: str, max_entries: int = 64, max_bytes: int = 256 * 1024 * 1024):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, Tuple[Any, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self._probe: Optional[sqlite3.Connection] = None
+        self._probe_inode = None
+        self._probe_pid = None
+        self._version = None
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    # -- change detection -----------------------------------------------------
+    def _file_stats(self) -> tuple:
+        stats = []
+        for suffix in ("", "-wal"):
+            try:
+                st = os.stat(self.db_path + suffix)
+                stats.append((st.st_ino, st.st_mtime_ns, st.st_size))
+            except OSError:
+                stats.append(None)
+        return tuple(stats)
+
+    def _close_probe(self):
+        if self._probe is not None:
+            try:
+                self._probe.close()
+            except sqlite3.Error:
+                pass
+        self._probe = None
+        self._probe_inode = None
+
+    def _data_version(self) -> Tuple[tuple, bool]:
+        """((PRAGMA data_version, file stats), whether the probe connection was just opened)."""
+        stats = self._file_stats()
+        if stats[0] is None:
+            self._close_probe()
+            return (None, stats), False
+        if self._probe_pid != os.getpid():
+            # A connection inherited through fork belongs to the parent: leave it alone.
+            self._probe, self._probe_inode = None, None
+        reopened = False
+        try:
+            if self._probe is None or self._probe_inode != stats[0][0]:
+                self._close_probe()
+                uri = pathlib.Path(self.db_path).as_uri() + "?mode=ro"
+                self._probe = sqlite3.connect(uri, uri=True, timeout=10, check_same_thread=False)
+                self._probe_inode = stats[0][0]
+                self._probe_pid = os.getpid()
+                reopened = True
+            version = self._probe.execute("PRAGMA data_version").fetchone()[0]
+        except sqlite3.Error:
+            self._close_probe()
+            version = None
+        return (version, stats), reopened
+
+    def _check_version(self):
+        version, reopened = self._data_version()
+        if reopened and self._version is not None and version[1] == self._version[1]:
+            # data_version values of different connections are not comparable; with
+            # unchanged files (e.g. a worker forked from a warmed-up parent) the entries
+            # are still current, so only the baseline moves.
+            self._version = version
+            return
+        if version != self._version:
+            if self._entries:
+                self.invalidations += 1
+            self._clear()
+            self._version = version
+
+    def data_token(self) -> tuple:
+        """Token that changes whenever the cached data may have changed."""
+        with self._lock:
+            self._check_version()
+            return (self._generation, self._version)
+
+    def file_state(self) -> Tuple[tuple, Optional[float]]:
+        """(database/WAL file stats, latest mtime in seconds); the same in every process.
+
+        Unlike ``data_token`` this can be compared across workers, so it is
+        what HTTP validators are built from.
+        """
+        stats = self._file_stats()
+        mtimes = [s[1] for s in stats if s is not None]
+        return stats, (max(mtimes) / 1e9 if mtimes else None)
+
+    # -- storage ----------------------------------------------------------------
+    def _clear(self):
+        self._entries.clear()
+        self._bytes = 0
+
+    def _store(self, key: Hashable, value: Any):
+        size = _sizeof(value)
+        if size > self.max_bytes:
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= old[1]
+        self._entries[key] = (value, size)
+        self._bytes += size
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+            self.evictions += 1
+
+    def get_or_build(self, key: Hashable, builder: Callable[[], Any]) -> Any:
+        with self._lock:
+            self._check_version()
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return _clone(entry[0])
+            self.misses += 1
+            token = (self._generation, self._version)
+
+        # Build outside the lock so one slow query does not serialize every request.
+        value = builder()
+
+        with self._lock:
+            if token == (self._generation, self._version):
+                self._store(key, value)
+        return _clone(value)
+
+    def invalidate(self):
+        """Drop every entry; call after committing a write to the database."""
+        with self._lock:
+            self._generation += 1
+            self.invalidations += 1
+            self._clear()
+
+    def cached(self, name: str):
+        """Decorator caching a function's result per argument combination.
+
+        Arguments are bound to the function's signature with defaults applied,
+        so ``f("100")``, ``f(building_code="100")`` and ``f("100", None)`` share
+        one entry.
+        """
+        def decorator(func):
+            signature = inspect.signature(func)
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                bound = signature.bind(*args, **kwargs)
+                bound.apply_defaults()
+                key = (name, bound.args, tuple(sorted(bound.kwargs.items())))
+                return self.get_or_build(key, lambda: func(*bound.args, **bound.kwargs))
+            wrapper.uncached = func
+            return wrapper
+        return decorator
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
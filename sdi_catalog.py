@@ -0,0 +1,178 @@
+## /home/developer/SDI_process/sdi_catalog.py
+
+import sqlite3
+from typing import Dict, List, Sequence, Tuple
+
+CATALOG_TABLE = "sdi_building_catalog"
+STATE_TABLE = "sdi_building_catalog_state"
+
+# Catalog columns, in table order.
+CATALOG_COLS = ["code", "name", "assets", "approved", "pending", "packaged", "exported"]
+
+# table -> columns whose changes can alter the catalog. Triggers on these mark
+# the catalog stale, whichever process (or application) writes the change.
+WATCHED_TABLES: Dict[str, Sequence[str]] = {
+    "sdi_dataset": ("Building", "Approved", "QR Code"),
+    "sdi_dataset_EL": ("Building", "Approved", "QR Code"),
+    "sdi_print_out": ("Building", "print_out", "QR Code"),
+    "Buildings": ("Code", "Name"),
+}
+
+_CREATE_CATALOG = f"""
+CREATE TABLE IF NOT EXISTS {CATALOG_TABLE} (
+    code TEXT PRIMARY KEY,
+    name TEXT,
+    assets INTEGER NOT NULL DEFAULT 0,
+    approved INTEGER NOT NULL DEFAULT 0,
+    pending INTEGER NOT NULL DEFAULT 0,
+    packaged INTEGER NOT NULL DEFAULT 0,
+    exported INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID
+"""
+_CREATE_STATE = f"""
+CREATE TABLE IF NOT EXISTS {STATE_TABLE} (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    dirty INTEGER NOT NULL DEFAULT 1,
+    refreshed_at TEXT
+)
+"""
+_MARK_DIRTY = f"UPDATE {STATE_TABLE} SET dirty = 1 WHERE dirty = 0"
+
+
+def _quote(name: str) -> str:
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _table_exists(conn, table_name: str) -> bool:
+    cur = conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (table_name,))
+    return cur.fetchone() is not None
+
+
+def _columns(conn, table_name: str) -> List[str]:
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({_quote(table_name)})").fetchall()]
+
+
+def ensure_building_catalog(conn):
+    """Create the catalog, its state row and the change triggers where missing.
+
+    Safe to call repeatedly; triggers for tables created later are added on the
+    next call.
+    """
+    conn.execute(_CREATE_CATALOG)
+    conn.execute(_CREATE_STATE)
+    conn.execute(f"INSERT OR IGNORE INTO {STATE_TABLE} (id, dirty) VALUES (1, 1)")
+    existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='trigger'")}
+    for table_name, watched in WATCHED_TABLES.items():
+        if not _table_exists(conn, table_name):
+            continue
+        available = set(_columns(conn, table_name))
+        columns = ", ".join(_quote(c) for c in watched if c in available)
+        events = {"ins": "INSERT", "del": "DELETE"}
+        if columns:
+            events["upd"] = f"UPDATE OF {columns}"
+        for suffix, event in events.items():
+            name = f"trg_{CATALOG_TABLE}_{table_name}_{suffix}"
+            if name not in existing:
+                conn.execute(
+                    f"CREATE TRIGGER IF NOT EXISTS {_quote(name)} AFTER {event} ON {_quote(table_name)} "
+                    f"BEGIN {_MARK_DIRTY}; END"
+                )
+
+
+def catalog_select(conn, assets: Sequence[Tuple[str, list]]) -> Tuple[str, list]:
+    """Return (sql, params) computing the catalog rows from the source tables.
+
+    ``assets`` holds one (sql, params) pair per asset table, each selecting
+    "Building", "QR Code" and an "is_approved" flag for every row.
+    """
+    params: list = []
+    union = []
+    for sql, sql_params in assets:
+        union.append(sql)
+        params.extend(sql_params)
+    has_print_out = _table_exists(conn, "sdi_print_out")
+    has_buildings = _table_exists(conn, "Buildings")
+
+    ctes = []
+    if has_buildings:
+        ctes.append("bn AS (SELECT CAST(Code AS TEXT) AS code, MAX(Name) AS name FROM Buildings "
+                    "WHERE Code IS NOT NULL GROUP BY 1)")
+    else:
+        ctes.append("bn AS (SELECT NULL AS code, NULL AS name WHERE 0)")
+
+    if not union:
+        union = ['SELECT NULL AS "Building", NULL AS "QR Code", 0 AS is_approved WHERE 0']
+    qr = 'TRIM(CAST(a."QR Code" AS TEXT))'
+    packaged = (f'EXISTS (SELECT 1 FROM sdi_print_out p WHERE p."QR Code" = {qr})' if has_print_out else "0")
+    ctes.append(
+        "asset_counts AS (SELECT CAST(a.\"Building\" AS TEXT) AS code, COUNT(*) AS assets, "
+        "SUM(a.is_approved) AS approved, "
+        f"SUM(a.is_approved AND NOT {packaged}) AS pending "
+        f"FROM ({' UNION ALL '.join(union)}) AS a "
+        "WHERE a.\"Building\" IS NOT NULL GROUP BY 1)"
+    )
+
+    if has_print_out:
+        # Older packages stored the building name instead of its code.
+        flag = 'CAST(p."print_out" AS TEXT)' if "print_out" in _columns(conn, "sdi_print_out") else "'0'"
+        ctes.append(
+            "print_counts AS (SELECT COALESCE(byname.code, CAST(p.\"Building\" AS TEXT)) AS code, "
+            f"SUM({flag} IS NOT '1') AS packaged, SUM({flag} IS '1') AS exported "
+            "FROM sdi_print_out p "
+            "LEFT JOIN bn ON bn.code = CAST(p.\"Building\" AS TEXT) "
+            "LEFT JOIN (SELECT name, MIN(code) AS code FROM bn GROUP BY name) AS byname "
+            "ON bn.code IS NULL AND byname.name = p.\"Building\" "
+            "WHERE p.\"Building\" IS NOT NULL GROUP BY 1)"
+        )
+    else:
+        ctes.append("print_counts AS (SELECT NULL AS code, 0 AS packaged, 0 AS exported WHERE 0)")
+
+    ctes.append("codes AS (SELECT code FROM bn UNION SELECT code FROM asset_counts UNION SELECT code FROM print_counts)")
+    sql = (
+        f"WITH {', '.join(ctes)} "
+        "SELECT c.code, bn.name, COALESCE(ac.assets, 0), COALESCE(ac.approved, 0), COALESCE(ac.pending, 0), "
+        "COALESCE(pc.packaged, 0), COALESCE(pc.exported, 0) "
+        "FROM codes c LEFT JOIN bn ON bn.code = c.code "
+        "LEFT JOIN asset_counts ac ON ac.code = c.code "
+        "LEFT JOIN print_counts pc ON pc.code = c.code "
+        "WHERE c.code IS NOT NULL"
+    )
+    return sql, params
+
+
+def is_stale(conn) -> bool:
+    if not _table_exists(conn, STATE_TABLE):
+        return True
+    row = conn.execute(f"SELECT dirty FROM {STATE_TABLE} WHERE id = 1").fetchone()
+    return row is None or bool(row[0])
+
+
+def refresh_building_catalog(conn, assets: Sequence[Tuple[str, list]]):
+    """Rebuild the catalog from the source tables in the caller's transaction.
+
+    The DELETE takes the write lock first, so no trigger can fire between the
+    recount and clearing the dirty flag.
+    """
+    ensure_building_catalog(conn)
+    conn.execute(f"DELETE FROM {CATALOG_TABLE}")
+    sql, params = catalog_select(conn, assets)
+    conn.execute(f"INSERT INTO {CATALOG_TABLE} ({', '.join(CATALOG_COLS)}) {sql}", params)
+    conn.execute(f"UPDATE {STATE_TABLE} SET dirty = 0, refreshed_at = datetime('now') WHERE id = 1")
+
+
+def read_building_catalog(conn, assets: Sequence[Tuple[str, list]]) -> List[dict]:
+    """Catalog rows as dicts, refreshing the table first when it is stale.
+
+    When the database cannot be written the rows are computed on the fly.
+    """
+    if is_stale(conn):
+        try:
+            refresh_building_catalog(conn, assets)
+            conn.commit()
+        except sqlite3.OperationalError as e:
+            conn.rollback()
+            print(f"[WARNING] in read_building_catalog: catalog not refreshed, computing it directly: {repr(e)}")
+            sql, params = catalog_select(conn, assets)
+            return [dict(zip(CATALOG_COLS, row)) for row in conn.execute(sql, params).fetchall()]
+    cur = conn.execute(f"SELECT {', '.join(CATALOG_COLS)} FROM {CATALOG_TABLE}")
+    return [dict(zip(CATALOG_COLS, row)) for row in cur.fetchall()]
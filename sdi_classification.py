@@ -0,0 +1,148 @@
+## /home/developer/SDI_process/sdi_classification.py
+
+from __future__ import annotations
+
+import sqlite3
+import threading
+from typing import Dict, Iterable, Mapping, Optional, Tuple
+
+from sdi_lazy import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+SOURCE_TABLE = "Asset_Group"
+STATE_TABLE = "sdi_asset_group_state"
+
+SQL_ASSET_GROUPS = 'SELECT Name, "Full Classification" FROM Asset_Group'
+
+_CREATE_STATE = f"""
+CREATE TABLE IF NOT EXISTS {STATE_TABLE} (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    version INTEGER NOT NULL DEFAULT 0
+)
+"""
+_BUMP_VERSION = f"UPDATE {STATE_TABLE} SET version = version + 1 WHERE id = 1"
+
+
+def _table_exists(conn, table_name: str) -> bool:
+    cur = conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (table_name,))
+    return cur.fetchone() is not None
+
+
+def _key(name) -> str:
+    return str(name).strip()
+
+
+def ensure_asset_group_tracking(conn):
+    """Create the version row and the triggers bumping it on every Asset_Group change."""
+    if not _table_exists(conn, SOURCE_TABLE):
+        return
+    conn.execute(_CREATE_STATE)
+    conn.execute(f"INSERT OR IGNORE INTO {STATE_TABLE} (id, version) VALUES (1, 0)")
+    for suffix, event in (("ins", "INSERT"), ("upd", "UPDATE"), ("del", "DELETE")):
+        conn.execute(
+            f'CREATE TRIGGER IF NOT EXISTS "trg_{STATE_TABLE}_{suffix}" AFTER {event} ON "{SOURCE_TABLE}" '
+            f"BEGIN {_BUMP_VERSION}; END"
+        )
+
+
+def asset_group_version(conn) -> Optional[int]:
+    """Current Asset_Group version, or None when the table is not tracked."""
+    if not _table_exists(conn, STATE_TABLE):
+        return None
+    row = conn.execute(f"SELECT version FROM {STATE_TABLE} WHERE id = 1").fetchone()
+    return None if row is None else row[0]
+
+
+class AssetGroupClassifier:
+    """Asset Group name -> Planon Full Classification, validated when it is built.
+
+    Names are matched after stripping surrounding spaces. ``overrides`` are
+    matched case-insensitively and win over the table; a name listed more
+    than once in the table is ambiguous and reported by ``conflicts``.
+    Unknown names are kept (stripped) as they are.
+    """
+
+    def __init__(self, rows: Iterable[Tuple[str, str]], overrides: Mapping[str, str] = None):
+        lookup: Dict[str, str] = {}
+        duplicates = set()
+        for name, classification in rows:
+            if name is None:
+                continue
+            key = _key(name)
+            if key in lookup:
+                duplicates.add(key)
+            lookup[key] = classification
+        self.overrides = {_key(k).lower(): v for k, v in (overrides or {}).items()}
+        self.lookup = {k: v for k, v in lookup.items() if k not in duplicates}
+        self.duplicates = frozenset(duplicates)
+        self.empty = not lookup
+
+    def resolve(self, values: pd.Series) -> Tuple[pd.Series, pd.Series]:
+        """(classified values, duplicate-name mask), both aligned with ``values``.
+
+        Only the distinct names are looked up; the results are spread back
+        to the rows through the factorized codes.
+        """
+        codes, uniques = pd.factorize(values, use_na_sentinel=True)
+        classified, conflicting = [], []
+        for name in uniques:
+            key = _key(name)
+            override = self.overrides.get(key.lower())
+            classified.append(override if override is not None else self.lookup.get(key, key))
+            conflicting.append(override is None and key in self.duplicates)
+        # A trailing None/False serves the missing values (code -1).
+        classified_arr = np.array(classified + [None], dtype=object)
+        conflicting_arr = np.array(conflicting + [False], dtype=bool)
+        return (pd.Series(classified_arr[codes], index=values.index, name=values.name),
+                pd.Series(conflicting_arr[codes], index=values.index))
+
+    def conflicts(self, values: pd.Series) -> pd.Series:
+        """Mask of the values whose name is duplicated in the table."""
+        return self.resolve(values)[1]
+
+    def classify(self, values: pd.Series) -> pd.Series:
+        """``values`` mapped to their Full Classification; same index, same order."""
+        return self.resolve(values)[0]
+
+
+def load_asset_group_classifier(conn, overrides: Mapping[str, str] = None) -> Optional[AssetGroupClassifier]:
+    """Build the classifier from the Asset_Group table; None when the table is missing."""
+    if not _table_exists(conn, SOURCE_TABLE):
+        return None
+    return AssetGroupClassifier(conn.execute(SQL_ASSET_GROUPS).fetchall(), overrides)
+
+
+class ClassifierCache:
+    """Keeps one classifier per Asset_Group version, shared by all threads.
+
+    Without the tracking triggers (e.g. a read-only database) the classifier
+    is rebuilt on every call.
+    """
+
+    def __init__(self, overrides: Mapping[str, str] = None):
+        self.overrides = dict(overrides or {})
+        self._lock = threading.Lock()
+        self._version = None
+        self._classifier: Optional[AssetGroupClassifier] = None
+
+    def get(self, conn) -> Optional[AssetGroupClassifier]:
+        try:
+            version = asset_group_version(conn)
+            if version is None and _table_exists(conn, SOURCE_TABLE):
+                ensure_asset_group_tracking(conn)
+                conn.commit()
+                version = asset_group_version(conn)
+        except sqlite3.OperationalError as e:
+            conn.rollback()
+            print(f"[WARNING] in ClassifierCache: Asset_Group changes not tracked: {repr(e)}")
+            version = None
+        with self._lock:
+            if version is not None and version == self._version:
+                return self._classifier
+        classifier = load_asset_group_classifier(conn, self.overrides)
+        if version is not None:
+            with self._lock:
+                self._version, self._classifier = version, classifier
+        return classifier
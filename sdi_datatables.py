@@ -0,0 +1,182 @@
+## /home/developer/SDI_process/sdi_datatables.py
+
+from __future__ import annotations
+
+import re
+from typing import Dict, List, Mapping, Tuple
+
+from sdi_lazy import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+# Upper bound on rows returned for one page, whatever the client asks for.
+MAX_PAGE_LENGTH = 1000
+# Columnar documents send a column dictionary encoded when it has at most this share of distinct values.
+DICTIONARY_RATIO = 0.5
+
+
+def _quote(name: str) -> str:
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _regexp(pattern, value) -> bool:
+    if value is None:
+        return False
+    try:
+        return re.search(pattern, str(value), re.IGNORECASE) is not None
+    except re.error:
+        return False
+
+
+def _like_pattern(term: str) -> str:
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def _as_int(value, default: int) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _is_true(value) -> bool:
+    return str(value).lower() == "true"
+
+
+def parse_request(args: Mapping, n_columns: int) -> Dict:
+    """Read the DataTables server-side parameters from a request's query args."""
+    columns = []
+    for i in range(n_columns):
+        columns.append({
+            "searchable": args.get(f"columns[{i}][searchable]", "true") != "false",
+            "orderable": args.get(f"columns[{i}][orderable]", "true") != "false",
+            "search": args.get(f"columns[{i}][search][value]", "") or "",
+            "regex": _is_true(args.get(f"columns[{i}][search][regex]")),
+        })
+
+    order = []
+    i = 0
+    while f"order[{i}][column]" in args:
+        col_idx = _as_int(args.get(f"order[{i}][column]"), -1)
+        direction = "DESC" if args.get(f"order[{i}][dir]", "asc").lower() == "desc" else "ASC"
+        if 0 <= col_idx < n_columns and columns[col_idx]["orderable"]:
+            order.append((col_idx, direction))
+        i += 1
+
+    length = _as_int(args.get("length"), 25)
+    if length < 0 or length > MAX_PAGE_LENGTH:
+        length = MAX_PAGE_LENGTH
+    return {
+        "draw": _as_int(args.get("draw"), 0),
+        "start": max(_as_int(args.get("start"), 0), 0),
+        "length": length,
+        "search": (args.get("search[value]", "") or "").strip(),
+        "regex": _is_true(args.get("search[regex]")),
+        "columns": columns,
+        "order": order,
+    }
+
+
+def _filter_clause(columns: List[str], params: Dict) -> Tuple[str, list]:
+    clauses, values = [], []
+    searchable = [c for c, spec in zip(columns, params["columns"]) if spec["searchable"]]
+
+    # Global search: every word has to appear in at least one searchable column.
+    if params["search"] and searchable:
+        terms = [params["search"]] if params["regex"] else params["search"].split()
+        for term in terms:
+            if params["regex"]:
+                parts = [f"{_quote(c)} REGEXP ?" for c in searchable]
+                values.extend([term] * len(searchable))
+            else:
+                parts = [f"CAST({_quote(c)} AS TEXT) LIKE ? ESCAPE '\\'" for c in searchable]
+                values.extend([_like_pattern(term)] * len(searchable))
+            clauses.append("(" + " OR ".join(parts) + ")")
+
+    for col, spec in zip(columns, params["columns"]):
+        if not spec["search"]:
+            continue
+        if spec["regex"]:
+            clauses.append(f"{_quote(col)} REGEXP ?")
+            values.append(spec["search"])
+        else:
+            clauses.append(f"CAST({_quote(col)} AS TEXT) LIKE ? ESCAPE '\\'")
+            values.append(_like_pattern(spec["search"]))
+
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", values
+
+
+def query_page(conn, base_sql: str, base_params: list, columns: List[str], args: Mapping) -> Dict:
+    """Run one DataTables page against ``base_sql`` and return the response payload.
+
+    ``base_sql`` must select exactly ``columns``; paging, ordering and both
+    global and per-column search are applied on top of it in SQLite.
+    """
+    params = parse_request(args, len(columns))
+    conn.create_function("REGEXP", 2, _regexp, deterministic=True)
+
+    base = f"SELECT * FROM ({base_sql}) AS base"
+    records_total = conn.execute(f"SELECT COUNT(*) FROM ({base_sql})", base_params).fetchone()[0]
+
+    where_sql, where_params = _filter_clause(columns, params)
+    if where_sql:
+        records_filtered = conn.execute(
+            f"SELECT COUNT(*) FROM ({base}{where_sql})", base_params + where_params
+        ).fetchone()[0]
+    else:
+        records_filtered = records_total
+
+    order_sql = ""
+    if params["order"]:
+        order_sql = " ORDER BY " + ", ".join(
+            f"{_quote(columns[idx])} COLLATE NOCASE {direction}" for idx, direction in params["order"]
+        )
+
+    page_sql = f"{base}{where_sql}{order_sql} LIMIT ? OFFSET ?"
+    cur = conn.execute(page_sql, base_params + where_params + [params["length"], params["start"]])
+    data = [["" if v is None else v for v in row] for row in cur.fetchall()]
+
+    return {
+        "draw": params["draw"],
+        "recordsTotal": records_total,
+        "recordsFiltered": records_filtered,
+        "data": data,
+    }
+
+
+def _json_value(value):
+    if hasattr(value, "item") and not isinstance(value, (str, bytes)):
+        value = value.item()  # numpy scalar -> Python scalar
+    return value
+
+
+def columnar_payload(df: pd.DataFrame, columns: List[str], value_maps: Mapping[str, Mapping] = None) -> Dict:
+    """The rows of ``df`` as one columnar document for a client-side DataTable.
+
+    ``data`` holds one entry per column: a plain list of values or, for
+    columns that repeat a lot (Building, Asset Group, ...), ``{"dict": [...],
+    "codes": [...]}`` with one dictionary index per row. Missing values are
+    sent as "" like in the server-side pages. ``value_maps`` translates the
+    values of a column (e.g. building codes to names); only the distinct
+    values are looked up.
+    """
+    n_rows = len(df)
+    value_maps = value_maps or {}
+    data = []
+    for col in columns:
+        if col not in df.columns:
+            data.append({"dict": [""], "codes": [0] * n_rows})
+            continue
+        codes, uniques = pd.factorize(df[col], use_na_sentinel=True)
+        mapping = value_maps.get(col) or {}
+        values = [_json_value(v) for v in uniques]
+        values = [mapping.get(str(v), v) for v in values] if mapping else values
+        values.append("")  # missing values (code -1) point at the trailing ""
+        codes = np.where(codes < 0, len(values) - 1, codes).tolist()
+        if len(uniques) <= DICTIONARY_RATIO * n_rows:
+            data.append({"dict": values, "codes": codes})
+        else:
+            data.append([values[c] for c in codes])
+    return {"format": "columnar", "columns": list(columns), "length": n_rows, "data": data}
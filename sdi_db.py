@@ -0,0 +1,267 @@
+## /home/developer/SDI_process/sdi_db.py
+
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
+
+# Applied to every pooled connection when it is opened.
+# journal_mode=WAL lets readers run while export_to_sdi writes; it is stored in
+# the database file, the others are per connection.
+DEFAULT_PRAGMAS: Sequence[Tuple[str, object]] = (
+    ("journal_mode", "WAL"),
+    ("synchronous", "NORMAL"),
+    ("cache_size", -16384),        # KiB, i.e. 16 MiB of page cache per connection
+    ("mmap_size", 268435456),      # 256 MiB
+    ("temp_store", "MEMORY"),
+)
+
+
+class ConnectionPool:
+    """Small pool of SQLite connections shared by the request threads.
+
+    Connections are opened lazily, configured once with ``pragmas`` and handed
+    back to the pool after use, so the connect and PRAGMA cost is paid once per
+    connection instead of once per helper call.
+    """
+
+    def __init__(self, db_path: str, timeout: float = 20, max_idle: int = 8,
+                 pragmas: Sequence[Tuple[str, object]] = DEFAULT_PRAGMAS):
+        self.db_path = db_path
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.pragmas = tuple(pragmas)
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=self.timeout, check_same_thread=False)
+        for name, value in self.pragmas:
+            try:
+                conn.execute(f"PRAGMA {name}={value}")
+            except sqlite3.Error as e:
+                print(f"[WARNING] in ConnectionPool: could not set PRAGMA {name}={value}: {repr(e)}")
+        return conn
+
+    def _acquire(self) -> sqlite3.Connection:
+        with self._lock:
+            # Connections must never cross a fork; start with an empty pool in the child.
+            if self._pid != os.getpid():
+                self._reset()
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return self._connect()
+
+    def _release(self, conn: sqlite3.Connection):
+        if self._pid == os.getpid() and self._idle.qsize() < self.max_idle:
+            self._idle.put(conn)
+        else:
+            conn.close()
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a connection; commits on success and rolls back on error."""
+        conn = self._acquire()
+        healthy = True
+        try:
+            yield conn
+            conn.commit()
+        except BaseException:
+            try:
+                conn.rollback()
+            except sqlite3.Error:
+                healthy = False
+            raise
+        finally:
+            if healthy:
+                self._release(conn)
+            else:
+                conn.close()
+
+    def close_all(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+# -----------------------------------------------------------------------------
+# Indexes
+# -----------------------------------------------------------------------------
+# index name -> (table, indexed columns). Expressions must match the SQL the
+# app issues character for character for SQLite to use them.
+INDEXES: Dict[str, Tuple[str, str]] = {
+    # NOT EXISTS anti-join, force-replace delete and the print_out update.
+    "idx_sdi_print_out_qr_code": ("sdi_print_out", '"QR Code"'),
+    # Duplicate check, which compares the stripped codes.
+    "idx_sdi_print_out_qr_code_trim": ("sdi_print_out", 'TRIM(CAST("QR Code" AS TEXT))'),
+    # Package lookup, exclude_package and the Planon export filter.
+    "idx_sdi_print_out_package": ("sdi_print_out", '"id_print_out", "print_out"'),
+    # Packaged rows of a building; covers the package list of the dashboard.
+    "idx_sdi_print_out_building": ("sdi_print_out", '"Building", "id_print_out"'),
+    # Approved rows of a building; also covers SELECT DISTINCT Building.
+    "idx_sdi_dataset_building_approved": ("sdi_dataset", '"Building", "Approved"'),
+    "idx_sdi_dataset_EL_building_approved": ("sdi_dataset_EL", '"Building", "Approved"'),
+    # Covering index for the Space lookup joined on the numeric QR code.
+    "idx_qr_codes_numeric_id": ("QR_codes", 'CAST("QR_code_ID" AS INTEGER), "Location"'),
+}
+
+
+def _quote(name: str) -> str:
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _table_exists(conn, table_name: str) -> bool:
+    cur = conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (table_name,))
+    return cur.fetchone() is not None
+
+
+def _index_names(conn, table_name: str) -> set:
+    return {row[1] for row in conn.execute(f"PRAGMA index_list({_quote(table_name)})").fetchall()}
+
+
+def ensure_indexes(conn, tables: Iterable[str] = None, create: bool = True) -> List[Tuple[str, str]]:
+    """Create any missing index from INDEXES and verify it exists afterwards.
+
+    Returns (index name, status) pairs; tables that do not exist yet are
+    skipped and picked up on a later call. With ``create=False`` only the
+    status is reported.
+    """
+    tables = set(tables) if tables is not None else None
+    report = []
+    created = False
+    for name, (table, columns) in INDEXES.items():
+        if tables is not None and table not in tables:
+            continue
+        if not _table_exists(conn, table):
+            report.append((name, "skipped (no table)"))
+            continue
+        if name in _index_names(conn, table):
+            report.append((name, "present"))
+            continue
+        if not create:
+            report.append((name, "missing"))
+            continue
+        try:
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {_quote(table)} ({columns})")
+        except sqlite3.Error as e:
+            report.append((name, f"failed ({e})"))
+            continue
+        created = True
+        report.append((name, "created" if name in _index_names(conn, table) else "missing after create"))
+    if created:
+        conn.execute("PRAGMA optimize")
+    return report
+
+
+def explain_query_plan(conn, sql: str, params: Sequence = ()) -> List[str]:
+    """Return the EXPLAIN QUERY PLAN detail lines for ``sql``."""
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", list(params)).fetchall()]
+
+
+def full_scans(plan: List[str]) -> List[str]:
+    """Plan lines that read a whole table instead of searching an index.
+
+    Scans of subqueries and CTEs (introduced by CO-ROUTINE/MATERIALIZE lines)
+    and of covering indexes are not reported.
+    """
+    derived, scans = set(), []
+    for detail in plan:
+        parts = detail.split()
+        if len(parts) >= 2 and parts[0] in ("CO-ROUTINE", "MATERIALIZE"):
+            derived.add(parts[1])
+        elif len(parts) >= 2 and parts[0] == "SCAN" and parts[1] not in derived and "COVERING INDEX" not in detail:
+            scans.append(detail)
+    return scans
+
+
+# -----------------------------------------------------------------------------
+# Bulk writes
+# -----------------------------------------------------------------------------
+@contextmanager
+def immediate_transaction(conn: sqlite3.Connection) -> Iterator[sqlite3.Connection]:
+    """Run the block in one BEGIN IMMEDIATE transaction.
+
+    The write lock is taken up front, so a concurrent writer waits on the busy
+    timeout here instead of failing halfway with "database is locked". The
+    connection must not be in a transaction already: committing the caller's
+    pending work here would split it from the block's.
+    """
+    if conn.in_transaction:
+        raise sqlite3.ProgrammingError("immediate_transaction() needs a connection without an open transaction")
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+
+
+@contextmanager
+def read_transaction(conn: sqlite3.Connection) -> Iterator[sqlite3.Connection]:
+    """Run the block's reads against one consistent view of the database.
+
+    Inside an already open transaction the block simply joins it.
+    """
+    if conn.in_transaction:
+        yield conn
+        return
+    conn.execute("BEGIN")
+    try:
+        yield conn
+    finally:
+        conn.rollback()
+
+
+def _sql_value(value):
+    if value is None:
+        return None
+    if hasattr(value, "item") and not isinstance(value, (str, bytes)):
+        value = value.item()  # numpy scalar -> Python scalar
+    try:
+        if value != value:  # NaN / NA
+            return None
+    except TypeError:  # pd.NA
+        return None
+    return value
+
+
+def bulk_insert(conn: sqlite3.Connection, table_name: str, columns: Sequence[str], rows: Iterable[Sequence]) -> int:
+    """Insert ``rows`` with one prepared statement through executemany."""
+    sql = (f"INSERT INTO {_quote(table_name)} ({', '.join(_quote(c) for c in columns)}) "
+           f"VALUES ({', '.join('?' for _ in columns)})")
+    cur = conn.executemany(sql, ([_sql_value(v) for v in row] for row in rows))
+    return cur.rowcount
+
+
+# -----------------------------------------------------------------------------
+# Batch operations on key sets
+# -----------------------------------------------------------------------------
+# Statements over many QR codes stage them in an indexed temp table and join
+# against it, instead of binding one ``?`` per code: the cost stays linear in
+# the number of keys and SQLITE_MAX_VARIABLE_NUMBER is never reached.
+def stage_keys(conn: sqlite3.Connection, keys: Iterable) -> str:
+    """Load ``keys`` into a temporary table and return a subquery selecting them.
+
+    The key column has no declared type on purpose: a TEXT column would apply
+    its affinity to expressions compared with it, which stops SQLite from
+    using expression indexes such as TRIM(CAST("QR Code" AS TEXT)).
+    """
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS sdi_stage_keys (key PRIMARY KEY)")
+    conn.execute("DELETE FROM temp.sdi_stage_keys")
+    conn.executemany("INSERT OR IGNORE INTO temp.sdi_stage_keys (key) VALUES (?)", ((k,) for k in keys))
+    return "SELECT key FROM temp.sdi_stage_keys"
+
+
+def execute_with_keys(conn: sqlite3.Connection, sql: str, keys: Iterable, params: Sequence = ()) -> sqlite3.Cursor:
+    """Run ``sql`` with its ``{keys}`` placeholder replaced by the staged ``keys``."""
+    return conn.execute(sql.format(keys=stage_keys(conn, keys)), list(params))
@@ -0,0 +1,143 @@
+## /home/developer/SDI_process/sdi_http.py
+
+import functools
+import gzip
+import hashlib
+import os
+from datetime import datetime, timezone
+from typing import Callable, Iterable, Optional, Tuple
+
+from flask import g, make_response, request, session
+from flask.globals import request_ctx
+from werkzeug.http import is_resource_modified
+
+try:
+    import brotli
+except ImportError:  # optional: without brotli every client gets gzip
+    brotli = None
+
+COMPRESSIBLE_TYPES = frozenset({
+    "text/html", "text/css", "text/plain", "text/csv", "text/javascript",
+    "application/javascript", "application/json", "image/svg+xml",
+})
+# Files served by send_file (e.g. static assets) are read into memory to be compressed only up to this size.
+MAX_FILE_BYTES = 4 * 1024 * 1024
+
+# (ETag, Last-Modified) of a view's current output.
+Validators = Tuple[str, Optional[datetime]]
+
+
+class Compression:
+    """Compress text responses of at least ``min_size`` bytes with brotli (when installed) or gzip.
+
+    Strong ETags of compressed responses are turned weak, since the bytes
+    now depend on the encoding the client accepted.
+    """
+
+    def __init__(self, min_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 5):
+        self.min_size = min_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    def init_app(self, app):
+        app.after_request(self._after_request)
+
+    def _encoding(self) -> Optional[str]:
+        accepted = request.accept_encodings
+        if brotli is not None and accepted["br"]:
+            return "br"
+        if accepted["gzip"]:
+            return "gzip"
+        return None
+
+    def compress(self, data: bytes, encoding: str) -> bytes:
+        if encoding == "br":
+            return brotli.compress(data, quality=self.brotli_quality)
+        return gzip.compress(data, compresslevel=self.gzip_level, mtime=0)
+
+    def _after_request(self, response):
+        if (response.status_code != 200 or "Content-Encoding" in response.headers
+                or response.mimetype not in COMPRESSIBLE_TYPES):
+            return response
+        response.vary.add("Accept-Encoding")
+        encoding = self._encoding()
+        if encoding is None:
+            return response
+        if response.direct_passthrough:
+            if (response.content_length or MAX_FILE_BYTES + 1) > MAX_FILE_BYTES:
+                return response
+            response.direct_passthrough = False
+        elif response.is_streamed:
+            return response
+
+        data = response.get_data()
+        if len(data) < self.min_size:
+            return response
+        response.set_data(self.compress(data, encoding))
+        response.headers["Content-Encoding"] = encoding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
+
+
+def make_etag(*parts) -> str:
+    return hashlib.sha1(repr(parts).encode()).hexdigest()[:24]
+
+
+def request_identity(ignore: Iterable[str] = ()) -> tuple:
+    """Path and sorted query arguments of the request, without the arguments named in ``ignore``."""
+    args = sorted((k, v) for k, v in request.args.items(multi=True) if k not in ignore)
+    return request.path, tuple(args)
+
+
+def release_time(paths: Iterable[str]) -> datetime:
+    """Latest modification time of the code and template files, so a deploy changes every validator."""
+    mtimes = [0.0]
+    for path in paths:
+        try:
+            mtimes.append(os.stat(path).st_mtime)
+        except OSError:
+            pass
+    return datetime.fromtimestamp(int(max(mtimes)), timezone.utc)
+
+
+def skip_validators():
+    """Send the current response without ETag/Last-Modified (e.g. an error page)."""
+    g._sdi_skip_validators = True
+
+
+def conditional(validators: Callable[[], Validators]):
+    """Decorator answering ``304 Not Modified`` when the client's copy of a view is current.
+
+    ``validators`` must change whenever the output may; it is checked before
+    the view runs, so an unchanged view costs no queries. Responses showing
+    flashed messages are never validated: they are meant to be seen once.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            if session.get("_flashes"):
+                return view(*args, **kwargs)
+            etag, last_modified = validators()
+            if not is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+                response = make_response("", 304)
+                _set_validators(response, etag, last_modified)
+                # The same Vary as the (possibly compressed) 200 it stands for.
+                response.vary.add("Accept-Encoding")
+                return response
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200 and not request_ctx.flashes and not g.get("_sdi_skip_validators"):
+                _set_validators(response, etag, last_modified)
+            return response
+        return wrapper
+    return decorator
+
+
+def _set_validators(response, etag: str, last_modified: Optional[datetime]):
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    # Browsers keep the copy but revalidate it on every use.
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
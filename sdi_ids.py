@@ -0,0 +1,67 @@
+## /home/developer/SDI_process/sdi_ids.py
+
+import sqlite3
+from typing import List
+
+from sdi_db import immediate_transaction
+
+ID_PREFIX = "SDI-"
+
+# UPDATE ... RETURNING needs SQLite 3.35; older libraries read the value back
+# inside the same write transaction instead.
+HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+
+def format_package_id(value: int) -> str:
+    return f"{ID_PREFIX}{value:05d}"
+
+
+def _ensure_sequence(conn: sqlite3.Connection):
+    conn.execute("CREATE TABLE IF NOT EXISTS sdi_sequence (last_value INTEGER)")
+    if conn.execute("SELECT 1 FROM sdi_sequence").fetchone() is not None:
+        return
+    # First use: continue after the highest package already in sdi_print_out.
+    initial_value = 0
+    try:
+        row = conn.execute(
+            'SELECT MAX(id_print_out) FROM sdi_print_out WHERE id_print_out IS NOT NULL AND id_print_out != ""'
+        ).fetchone()
+        max_id = row[0] if row else None
+        if max_id and max_id.startswith(ID_PREFIX):
+            initial_value = int(max_id.split('-')[-1])
+    except (sqlite3.OperationalError, IndexError, ValueError):
+        pass
+    conn.execute("INSERT INTO sdi_sequence (last_value) VALUES (?)", (initial_value,))
+
+
+def _reserve(conn: sqlite3.Connection, count: int) -> List[str]:
+    _ensure_sequence(conn)
+    if HAS_RETURNING:
+        last_value = conn.execute(
+            "UPDATE sdi_sequence SET last_value = last_value + ? RETURNING last_value", (count,)
+        ).fetchone()[0]
+    else:
+        conn.execute("UPDATE sdi_sequence SET last_value = last_value + ?", (count,))
+        last_value = conn.execute("SELECT last_value FROM sdi_sequence").fetchone()[0]
+    return [format_package_id(v) for v in range(last_value - count + 1, last_value + 1)]
+
+
+def reserve_package_ids(conn: sqlite3.Connection, count: int = 1) -> List[str]:
+    """Reserve ``count`` consecutive package IDs and return them in order.
+
+    The increment is a single UPDATE, so two callers can never get the same
+    value. Outside a transaction the reservation commits on its own in a
+    BEGIN IMMEDIATE transaction. Inside one, it commits or rolls back with
+    the caller's transaction, so that should have been opened with
+    immediate_transaction() to avoid lock upgrades failing under load.
+    """
+    if count < 1:
+        raise ValueError("count must be at least 1")
+    if conn.in_transaction:
+        return _reserve(conn, count)
+    with immediate_transaction(conn):
+        return _reserve(conn, count)
+
+
+def next_package_id(conn: sqlite3.Connection) -> str:
+    return reserve_package_ids(conn, 1)[0]
@@ -0,0 +1,162 @@
+## /home/developer/SDI_process/sdi_jobs.py
+
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    owner TEXT,
+    status TEXT NOT NULL,
+    message TEXT,
+    category TEXT,
+    filename TEXT,
+    path TEXT,
+    reported INTEGER NOT NULL DEFAULT 0,
+    pid INTEGER,
+    created_at REAL NOT NULL,
+    finished_at REAL
+)
+"""
+
+ACTIVE_STATUSES = ("queued", "running")
+
+
+def _pid_alive(pid: Optional[int]) -> bool:
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JobRunner:
+    """Runs exports in background threads with their state kept in SQLite.
+
+    Job state lives in its own small database so every worker process can
+    report on and serve any job. A job function returns a dict with
+    ``message``/``category`` and, for downloads, ``filename`` and ``data``
+    (bytes), which are written to ``output_dir``. Exceptions mark the job as
+    failed, using the exception's ``category`` attribute when it has one.
+    """
+
+    def __init__(self, db_path: str, output_dir: str, max_workers: int = 2, retention_hours: float = 24):
+        self.db_path = db_path
+        self.output_dir = output_dir
+        self.max_workers = max_workers
+        self.retention_seconds = retention_hours * 3600
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pid = None
+        self._ready = False
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.db_path, timeout=20)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _setup(self):
+        if self._ready:
+            return
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        os.makedirs(self.output_dir, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(_SCHEMA)
+        self._ready = True
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            # Worker threads do not survive a fork; start a fresh pool in the child.
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="sdi-job")
+                self._pid = os.getpid()
+            return self._executor
+
+    def _update(self, job_id: str, **fields):
+        cols = ", ".join(f"{k} = ?" for k in fields)
+        with self._connect() as conn:
+            conn.execute(f"UPDATE jobs SET {cols} WHERE id = ?", (*fields.values(), job_id))
+
+    def submit(self, kind: str, func: Callable[..., dict], *args, owner: str = None) -> str:
+        """Queue ``func(*args)`` and return the new job's ID straight away."""
+        self._setup()
+        self.purge_expired()
+        job_id = uuid.uuid4().hex
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, kind, owner, status, pid, created_at) VALUES (?, ?, ?, 'queued', ?, ?)",
+                (job_id, kind, owner, os.getpid(), time.time()),
+            )
+        self._get_executor().submit(self._run, job_id, func, args)
+        return job_id
+
+    def _run(self, job_id: str, func: Callable[..., dict], args: tuple):
+        self._update(job_id, status="running")
+        try:
+            result = func(*args) or {}
+            path = None
+            if result.get("data") is not None:
+                path = os.path.join(self.output_dir, f"{job_id}.bin")
+                with open(path, "wb") as f:
+                    f.write(result["data"])
+            self._update(
+                job_id, status="finished", message=result.get("message"),
+                category=result.get("category", "success"), filename=result.get("filename"),
+                path=path, finished_at=time.time(),
+            )
+        except Exception as e:
+            # Errors carrying a category are expected outcomes meant for the user.
+            if not hasattr(e, "category"):
+                print(f"[ERROR] in job {job_id}: {repr(e)}")
+            self._update(
+                job_id, status="failed", message=str(e),
+                category=getattr(e, "category", "danger"), finished_at=time.time(),
+            )
+
+    def get(self, job_id: str) -> Optional[dict]:
+        self._setup()
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        if job["status"] in ACTIVE_STATUSES and not _pid_alive(job["pid"]):
+            job.update(status="failed", category="danger",
+                       message="The export was interrupted by a server restart. Please run it again.")
+            self._update(job_id, status=job["status"], category=job["category"],
+                         message=job["message"], finished_at=time.time())
+        return job
+
+    def mark_reported(self, job_id: str) -> bool:
+        """Flag a finished job as shown to its owner; True only the first time."""
+        with self._connect() as conn:
+            cur = conn.execute("UPDATE jobs SET reported = 1 WHERE id = ? AND reported = 0", (job_id,))
+            return cur.rowcount == 1
+
+    def purge_expired(self):
+        cutoff = time.time() - self.retention_seconds
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id, path FROM jobs WHERE finished_at IS NOT NULL AND finished_at < ?", (cutoff,)
+            ).fetchall()
+            for row in rows:
+                if row["path"] and os.path.exists(row["path"]):
+                    os.remove(row["path"])
+            conn.execute("DELETE FROM jobs WHERE finished_at IS NOT NULL AND finished_at < ?", (cutoff,))
@@ -0,0 +1,56 @@
+## /home/developer/SDI_process/sdi_lazy.py
+
+import importlib
+import importlib.util
+import threading
+from types import ModuleType
+from typing import Optional
+
+
+class LazyModule:
+    """Stand-in for a module that is only imported on first attribute access.
+
+    ``pd = LazyModule("pandas")`` costs nothing at import time; the first
+    ``pd.DataFrame`` imports pandas (once, under a lock, so concurrent first
+    requests are safe) and every later access goes straight to the module.
+    Modules using one should add ``from __future__ import annotations`` so
+    signatures like ``-> pd.DataFrame`` do not trigger the import.
+    """
+
+    def __init__(self, name: str):
+        self.__dict__["_name"] = name
+        self.__dict__["_module"] = None
+        self.__dict__["_lock"] = threading.Lock()
+
+    def _load(self) -> ModuleType:
+        module = self.__dict__["_module"]
+        if module is None:
+            with self.__dict__["_lock"]:
+                module = self.__dict__["_module"]
+                if module is None:
+                    module = importlib.import_module(self.__dict__["_name"])
+                    self.__dict__["_module"] = module
+        return module
+
+    def __getattr__(self, attr: str):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr: str, value):
+        setattr(self._load(), attr, value)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self.__dict__["_module"] is not None else "not loaded"
+        return f"<LazyModule {self.__dict__['_name']!r} ({state})>"
+
+
+def lazy_import(name: str) -> LazyModule:
+    return LazyModule(name)
+
+
+def optional_lazy_import(name: str) -> Optional[LazyModule]:
+    """A LazyModule for ``name`` if it is installed, else None (checked without importing it)."""
+    try:
+        found = importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        found = False
+    return LazyModule(name) if found else None
@@ -0,0 +1,182 @@
+## /home/developer/SDI_process/sdi_metrics.py
+
+import functools
+import json
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+from flask import g, has_request_context, request
+
+# Upper bounds (seconds) of the latency histogram buckets; +Inf is implicit.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# (name, type, help, value) for samples reported by collectors.
+Sample = Tuple[str, str, str, float]
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Histogram:
+    """Cumulative latency histogram per label combination, in Prometheus terms."""
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str], buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[tuple, List] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: Sequence, value: float):
+        key = tuple(str(v) for v in labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][bisect_left(self.buckets, value)] += 1
+            series[1] += value
+            series[2] += 1
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((k, ([*v[0]], v[1], v[2])) for k, v in self._series.items())
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                le = 'le="%g"' % bound
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, key, le)} {cumulative}")
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_labels(self.label_names, key, le)} {count}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, key)} {total:.6f}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, key)} {count}")
+        return lines
+
+
+class Metrics:
+    """Stage timers, per-request Server-Timing headers, JSON request logs and a Prometheus report.
+
+    ``stage(name)`` and ``timed(name)`` record into the stage histogram from
+    any thread; inside a request the durations are also listed in the
+    response's Server-Timing header and its log line. The numbers are per
+    process: each worker reports its own.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.stage_seconds = Histogram(
+            "sdi_stage_duration_seconds", "Time spent in each instrumented stage.", ("stage",), buckets)
+        self.request_seconds = Histogram(
+            "sdi_request_duration_seconds", "Request latency by endpoint, method and status.",
+            ("endpoint", "method", "status"), buckets)
+        self._collectors: List[Callable[[], Iterable[Sample]]] = []
+        self._active = threading.local()
+        self.log_requests = True
+
+    # -- stages -------------------------------------------------------------
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        active = self._active.__dict__.setdefault("names", set())
+        if name in active:
+            # Already timed further up the stack (e.g. a wrapper calling the timed function).
+            yield
+            return
+        active.add(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            active.discard(name)
+            self.stage_seconds.observe((name,), elapsed)
+            if has_request_context():
+                stages = g.get("_sdi_stages")
+                if stages is not None:
+                    stages.append((name, elapsed))
+
+    def timed(self, name: str):
+        """Decorator timing every call of a function as stage ``name``."""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.stage(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    # -- requests -----------------------------------------------------------
+    def init_app(self, app, log_requests: bool = True):
+        self.log_requests = log_requests
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+
+    def _before_request(self):
+        g._sdi_start = time.perf_counter()
+        g._sdi_stages = []
+
+    @staticmethod
+    def _server_timing(stages: List[Tuple[str, float]], total: float) -> Tuple[str, Dict[str, float]]:
+        totals: Dict[str, float] = {}
+        for name, elapsed in stages:
+            totals[name] = totals.get(name, 0.0) + elapsed
+        ms = {name: round(elapsed * 1000, 2) for name, elapsed in totals.items()}
+        header = ", ".join([f"{name};dur={dur}" for name, dur in ms.items()] + [f"total;dur={total * 1000:.2f}"])
+        return header, ms
+
+    def _after_request(self, response):
+        start = g.get("_sdi_start")
+        if start is None:
+            return response
+        total = time.perf_counter() - start
+        endpoint = request.endpoint or "none"
+        self.request_seconds.observe((endpoint, request.method, response.status_code), total)
+        header, stages_ms = self._server_timing(g.get("_sdi_stages") or [], total)
+        response.headers["Server-Timing"] = header
+        if self.log_requests and endpoint != "static":
+            print(json.dumps({
+                "ts": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+                "event": "request",
+                "method": request.method,
+                "path": request.path,
+                "endpoint": endpoint,
+                "status": response.status_code,
+                "duration_ms": round(total * 1000, 2),
+                "stages_ms": stages_ms,
+                "bytes": response.calculate_content_length(),
+            }, ensure_ascii=False), flush=True)
+        return response
+
+    def reset(self):
+        """Forget every observation (e.g. those a forked worker inherited from its parent)."""
+        self.stage_seconds.clear()
+        self.request_seconds.clear()
+
+    # -- report -------------------------------------------------------------
+    def add_collector(self, collector: Callable[[], Iterable[Sample]]):
+        """Register a callable returning extra (name, type, help, value) samples for ``render``."""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        lines = self.stage_seconds.render() + self.request_seconds.render()
+        for collector in self._collectors:
+            for name, kind, help_text, value in collector():
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}", f"{name} {value}"]
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,75 @@
+## /home/developer/SDI_process/sdi_normalize.py
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Dict, Optional
+
+from sdi_lazy import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+# Rating column -> unit written to its "(UoM)" column when the rating is filled in.
+UOM_COLUMNS: Dict[str, str] = {
+    "Voltage Rating": "V",
+    "Amperage Rating": "A",
+}
+
+YEAR_COLUMN = "Date Of Manufacture Or Construction"
+
+
+def has_value(s: pd.Series) -> np.ndarray:
+    """True where the value is not null and not blank once stripped."""
+    codes, uniques = pd.factorize(s, use_na_sentinel=True)
+    filled = pd.Series(uniques, dtype=object).astype(str).str.strip().ne("").to_numpy(dtype=bool)
+    return np.append(filled, False)[codes]  # code -1 (null) picks the trailing False
+
+
+def format_years_to_dates(s: pd.Series, current_year: Optional[int] = None) -> pd.Series:
+    """Turn year values into "YYYY-01-01" dates, column at a time.
+
+    Four digit years between 1900 and 2100 are kept; two digit years are
+    pivoted on the current year (above it means 19xx, otherwise 20xx). A
+    trailing ".0" left by float columns is ignored. Anything else is
+    returned unchanged.
+    """
+    if current_year is None:
+        current_year = datetime.now().year
+    pivot = current_year % 100
+
+    # The column repeats a handful of distinct values: parse each one once.
+    codes, uniques = pd.factorize(s, use_na_sentinel=True)
+    text = pd.Series(uniques, dtype=object).astype(str).str.strip().str.replace(r"\.0$", "", regex=True)
+    digits = text.str.fullmatch(r"[0-9]+").to_numpy(dtype=bool)
+    length = text.str.len().to_numpy()
+    years = pd.to_numeric(text.where(digits), errors="coerce").to_numpy(dtype="float64")
+
+    four = digits & (length == 4) & (years > 1900) & (years < 2100)
+    two = digits & (length == 2)
+    full_year = np.where(two, np.where(years > pivot, 1900 + years, 2000 + years), years)
+
+    matched = four | two
+    dates = np.array([f"{int(y)}-01-01" if m else None for y, m in zip(full_year, matched)], dtype=object)
+
+    out = s.astype(object)
+    rows = np.append(matched, False)[codes]  # code -1 (null) picks the trailing False
+    if rows.any():
+        out[rows] = dates[codes[rows]]
+    return out
+
+
+def add_uom_columns(df: pd.DataFrame, units: Dict[str, str] = UOM_COLUMNS) -> pd.DataFrame:
+    """Add a "<rating> (UoM)" column for every rating column present in ``df``."""
+    for col, unit in units.items():
+        if col in df.columns:
+            df[f"{col} (UoM)"] = np.where(has_value(df[col]), unit, "")
+    return df
+
+
+def normalize_planon_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """Apply the Planon value normalizations to ``df`` in place and return it."""
+    add_uom_columns(df)
+    if YEAR_COLUMN in df.columns:
+        df[YEAR_COLUMN] = format_years_to_dates(df[YEAR_COLUMN])
+    return df
@@ -0,0 +1,122 @@
+## /home/developer/SDI_process/sdi_schema.py
+
+from __future__ import annotations
+
+import functools
+import importlib.util
+import re
+from typing import Iterable
+
+from sdi_lazy import lazy_import
+
+pd = lazy_import("pandas")
+
+# Low-cardinality text columns stored as categoricals.
+CATEGORY_COLS = ("Building", "Asset Group", "Attribute", "Manufacturer")
+# Columns stored as nullable integers when that loses nothing.
+NUMERIC_COLS = ("Ampere", "Volts", "Year")
+# A column is only made categorical when it has at most this share of distinct values.
+MAX_CATEGORY_RATIO = 0.5
+# Rows of the asset tables that count as approved, for the app and SDI_process_database.py
+# alike. Same rows as the former ``df["Approved"].astype(str) == "1"``: integer 1 and
+# text '1', but not 1.0, ' 1' or 'true'.
+SQL_APPROVED = 'CAST("Approved" AS TEXT) = \'1\''
+
+# attrs key listing the columns converted from text to numbers, so as_plain can undo it.
+_TEXT_NUMERIC_ATTR = "sdi_text_numeric"
+_CANONICAL_INT_RE = re.compile(r"-?(?:0|[1-9][0-9]*)")
+
+
+@functools.lru_cache(maxsize=None)
+def string_dtype():
+    """The pyarrow string dtype, or None when pyarrow is not installed."""
+    if importlib.util.find_spec("pyarrow") is None:
+        return None
+    return pd.StringDtype("pyarrow")
+
+
+def _is_text(s: pd.Series) -> bool:
+    return s.dtype == object or isinstance(s.dtype, pd.StringDtype)
+
+
+def _as_nullable_int(s: pd.Series):
+    """``s`` as Int64 if every value round-trips exactly, else None.
+
+    "05", "15.0", "120/208" and blank strings all stay text: converting them
+    would change what is written back to SQLite or to the Planon workbook.
+    """
+    if pd.api.types.is_integer_dtype(s.dtype):
+        return s.astype("Int64")
+    if not _is_text(s):
+        return None
+    values = s.dropna()
+    if values.empty:
+        return None
+    uniques = pd.unique(values)
+    if not all(isinstance(v, str) and _CANONICAL_INT_RE.fullmatch(v) for v in uniques):
+        return None
+    return pd.to_numeric(s, errors="raise").astype("Int64")
+
+
+def optimize_frame(df: pd.DataFrame, category_cols: Iterable[str] = CATEGORY_COLS,
+                   numeric_cols: Iterable[str] = NUMERIC_COLS) -> pd.DataFrame:
+    """Store the asset columns in compact dtypes; columns are replaced in place.
+
+    Categoricals for the low-cardinality columns, nullable integers where the
+    conversion is lossless and pyarrow strings (when installed) for the other
+    text columns. Existing categoricals are treated like the text they hold.
+    Mixed-type columns are left as they are.
+    """
+    if df.empty:
+        return df
+    converted = list(df.attrs.get(_TEXT_NUMERIC_ATTR, []))
+    for col in df.columns:
+        s = df[col]
+        if isinstance(s.dtype, pd.CategoricalDtype):
+            # Dictionary columns of a snapshot arrive as categoricals holding the
+            # categories of every building; they follow the same rule as text.
+            s = s.cat.remove_unused_categories()
+            if col not in category_cols or s.nunique(dropna=True) > MAX_CATEGORY_RATIO * len(s):
+                s = s.astype(object)
+            df[col] = s
+        if col in category_cols:
+            if s.nunique(dropna=True) <= MAX_CATEGORY_RATIO * len(s):
+                df[col] = s.astype("category")
+            continue
+        if col in numeric_cols:
+            as_int = _as_nullable_int(s)
+            if as_int is not None:
+                if _is_text(s):
+                    converted.append(col)
+                df[col] = as_int
+                continue
+        if string_dtype() is not None and s.dtype == object:
+            values = s.dropna()
+            if all(isinstance(v, str) for v in pd.unique(values)):
+                df[col] = s.astype(string_dtype())
+    df.attrs[_TEXT_NUMERIC_ATTR] = converted
+    return df
+
+
+def as_plain(df: pd.DataFrame) -> pd.DataFrame:
+    """Return ``df`` with categoricals and text-derived numbers turned back into plain values.
+
+    Use before code that assigns new values into those columns (a categorical
+    rejects values outside its categories).
+    """
+    text_numeric = set(df.attrs.get(_TEXT_NUMERIC_ATTR, []))
+    plain = {}
+    for col in df.columns:
+        s = df[col]
+        if isinstance(s.dtype, pd.CategoricalDtype):
+            dtype = s.cat.categories.dtype
+            if not (_is_text(s.cat.categories) or isinstance(dtype, pd.StringDtype)) and s.hasnans:
+                dtype = object  # e.g. integer codes with missing values
+            plain[col] = s.astype(dtype)
+        elif col in text_numeric and pd.api.types.is_integer_dtype(s.dtype):
+            plain[col] = s.astype(object).where(s.notna(), None).map(lambda v: v if v is None else str(v))
+    if not plain:
+        return df
+    df = df.assign(**plain)
+    df.attrs[_TEXT_NUMERIC_ATTR] = [c for c in df.attrs.get(_TEXT_NUMERIC_ATTR, []) if c not in plain]
+    return df
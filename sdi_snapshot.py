@@ -0,0 +1,185 @@
+## /home/developer/SDI_process/sdi_snapshot.py
+
+from __future__ import annotations
+
+import os
+import threading
+import zlib
+from typing import Optional, Sequence
+
+from sdi_lazy import lazy_import, optional_lazy_import
+
+pd = lazy_import("pandas")
+# Optional: without pyarrow every read simply misses.
+pa = optional_lazy_import("pyarrow")
+ipc = lazy_import("pyarrow.ipc")
+
+# Low-cardinality columns stored dictionary encoded.
+DICTIONARY_COLS = ("Building", "Asset Group", "Manufacturer")
+
+# Per-table version counters, bumped by triggers on every insert, update and
+# delete. Snapshots are only written for tables tracked this way.
+STATE_TABLE = "sdi_snapshot_state"
+
+_CREATE_STATE = f"""
+CREATE TABLE IF NOT EXISTS {STATE_TABLE} (
+    table_name TEXT PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0
+)
+"""
+_EVENTS = (("ins", "INSERT"), ("upd", "UPDATE"), ("del", "DELETE"))
+
+_SIGNATURE_KEY = b"sdi_signature"
+# What the snapshot holds (e.g. "approved_assets"); writers of different row
+# sets or columns may share the signature, so readers check both.
+_KIND_KEY = b"sdi_kind"
+
+
+def available() -> bool:
+    return pa is not None
+
+
+def _quote(name: str) -> str:
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _table_exists(conn, table_name: str) -> bool:
+    cur = conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (table_name,))
+    return cur.fetchone() is not None
+
+
+def _trigger_names(table_name: str) -> list:
+    return [f"trg_{STATE_TABLE}_{table_name}_{suffix}" for suffix, _ in _EVENTS]
+
+
+def ensure_snapshot_tracking(conn, tables: Sequence[str]):
+    """Create the version rows and the triggers bumping them on every change to ``tables``.
+
+    Tables that do not exist yet are skipped and picked up on a later call.
+    """
+    conn.execute(_CREATE_STATE)
+    for table_name in tables:
+        if not _table_exists(conn, table_name):
+            continue
+        conn.execute(f"INSERT OR IGNORE INTO {STATE_TABLE} (table_name, version) VALUES (?, 0)", (table_name,))
+        literal = "'" + table_name.replace("'", "''") + "'"
+        bump = f"UPDATE {STATE_TABLE} SET version = version + 1 WHERE table_name = {literal}"
+        for name, (_, event) in zip(_trigger_names(table_name), _EVENTS):
+            conn.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {_quote(name)} AFTER {event} ON {_quote(table_name)} "
+                f"BEGIN {bump}; END"
+            )
+
+
+def source_signature(conn, tables: Sequence[str]) -> Optional[str]:
+    """Token that changes whenever the rows of ``tables`` change, or None if one is not tracked.
+
+    Only the versions of ``tables`` are used, so writes to other tables keep
+    the snapshot current. Read it in the same transaction as the snapshot
+    data, otherwise a concurrent write can fall between the two.
+    """
+    if not _table_exists(conn, STATE_TABLE):
+        return None
+    names = sorted(set(tables))
+    marks = ", ".join("?" for _ in names)
+    versions = dict(conn.execute(
+        f"SELECT table_name, version FROM {STATE_TABLE} WHERE table_name IN ({marks})", names
+    ).fetchall())
+    expected = [trigger for name in names for trigger in _trigger_names(name)]
+    found = conn.execute(
+        f"SELECT COUNT(*) FROM sqlite_master WHERE type='trigger' AND name IN ({', '.join('?' for _ in expected)})",
+        expected,
+    ).fetchone()[0]
+    if len(versions) < len(names) or found < len(expected):
+        return None
+    # Adding or renaming a column changes what is read without bumping a version.
+    columns = [
+        zlib.crc32(",".join(row[1] for row in conn.execute(f"PRAGMA table_info({_quote(name)})")).encode("utf-8"))
+        for name in names
+    ]
+    return ";".join(f"{name}:{versions[name]}:{crc:08x}" for name, crc in zip(names, columns))
+
+
+def _to_arrow(df: pd.DataFrame) -> "pa.Table":
+    arrays = []
+    for col in df.columns:
+        try:
+            arr = pa.array(df[col], from_pandas=True)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            # Mixed Python types (e.g. ints and text in one column) are stored as text.
+            values = df[col].astype(object)
+            arr = pa.array(values.where(values.isna(), values.astype(str)), type=pa.string(), from_pandas=True)
+        if col in DICTIONARY_COLS and not pa.types.is_dictionary(arr.type):
+            if pa.types.is_null(arr.type):
+                arr = arr.cast(pa.string())
+            arr = arr.dictionary_encode()
+        arrays.append(arr)
+    return pa.Table.from_arrays(arrays, names=[str(c) for c in df.columns])
+
+
+def write_snapshot(df: pd.DataFrame, path: str, signature: str, kind: str = "") -> bool:
+    """Write ``df`` as an uncompressed Arrow IPC file tagged with ``signature`` and ``kind``.
+
+    The file is written next to ``path`` and renamed into place, so readers
+    never see a partial snapshot. Returns False when pyarrow is missing.
+    """
+    if pa is None:
+        return False
+    table = _to_arrow(df)
+    table = table.replace_schema_metadata({_SIGNATURE_KEY: signature.encode("utf-8"),
+                                           _KIND_KEY: kind.encode("utf-8")})
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with pa.OSFile(tmp_path, "wb") as sink, ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return True
+
+
+def _metadata(schema, key: bytes) -> str:
+    return (schema.metadata or {}).get(key, b"").decode("utf-8")
+
+
+def read_snapshot_signature(path: str, kind: str = "") -> Optional[str]:
+    """Signature stored in the snapshot, without reading its data; None for another ``kind``."""
+    if pa is None or not os.path.exists(path):
+        return None
+    try:
+        schema = ipc.open_file(pa.memory_map(path, "r")).schema
+    except (OSError, pa.ArrowInvalid):
+        return None
+    if _metadata(schema, _KIND_KEY) != kind:
+        return None
+    return _metadata(schema, _SIGNATURE_KEY)
+
+
+def read_snapshot_table(path: str, signature: Optional[str] = None, kind: str = "") -> Optional["pa.Table"]:
+    """Memory-map the snapshot and return it as an Arrow table (no copy).
+
+    Returns None when pyarrow is missing, the file does not exist, or it was
+    written for another ``kind`` or with another ``signature``.
+    """
+    if pa is None or not os.path.exists(path):
+        return None
+    try:
+        reader = ipc.open_file(pa.memory_map(path, "r"))
+    except (OSError, pa.ArrowInvalid) as e:
+        print(f"[WARNING] in read_snapshot_table: unreadable snapshot {path}: {repr(e)}")
+        return None
+    if _metadata(reader.schema, _KIND_KEY) != kind:
+        return None
+    if signature is not None and _metadata(reader.schema, _SIGNATURE_KEY) != signature:
+        return None
+    return reader.read_all()
+
+
+def read_snapshot(path: str, signature: Optional[str] = None, kind: str = "") -> Optional[pd.DataFrame]:
+    """The snapshot as a DataFrame; dictionary columns come back as categoricals."""
+    table = read_snapshot_table(path, signature, kind)
+    if table is None:
+        return None
+    return table.to_pandas()
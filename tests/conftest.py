@@ -0,0 +1,55 @@
+import sqlite3
+
+import pytest
+
+# Source tables as the capture app creates them: Electrical names the tag column differently.
+SOURCE_SCHEMAS = {
+    "sdi_dataset": ["QR Code", "Building", "Description", "Asset Group", "Attribute", "UBC Tag", "Approved"],
+    "sdi_dataset_EL": ["QR Code", "Building", "Description", "Asset Group", "Attribute", "UBC Asset Tag", "Approved"],
+}
+
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def insert_rows(conn, table_name, rows):
+    """Insert ``rows`` (dicts keyed by column name) into one of the source tables."""
+    cols = SOURCE_SCHEMAS[table_name]
+    conn.executemany(
+        f"INSERT INTO {_quote(table_name)} ({', '.join(_quote(c) for c in cols)}) "
+        f"VALUES ({', '.join('?' for _ in cols)})",
+        [[row.get(c) for c in cols] for row in rows],
+    )
+
+
+@pytest.fixture
+def source_db(tmp_path):
+    """Path of a database holding empty source tables."""
+    path = str(tmp_path / "QR_codes.db")
+    conn = sqlite3.connect(path)
+    for table_name, cols in SOURCE_SCHEMAS.items():
+        conn.execute(f"CREATE TABLE {_quote(table_name)} ({', '.join(_quote(c) for c in cols)})")
+    conn.commit()
+    conn.close()
+    return path
+
+
+@pytest.fixture
+def app_db(source_db, tmp_path, monkeypatch):
+    """``source_db`` as the app's database, with the snapshots and caches kept apart from the real ones."""
+    import app
+    from sdi_classification import ClassifierCache
+    from sdi_db import ConnectionPool
+
+    pool = ConnectionPool(source_db)
+    monkeypatch.setattr(app, "DB_PATH", source_db)
+    monkeypatch.setattr(app, "db_pool", pool)
+    monkeypatch.setattr(app, "SNAPSHOT_PATH", str(tmp_path / "sdi_dataset.arrow"))
+    monkeypatch.setattr(app, "PRINT_OUT_SNAPSHOT_PATH", str(tmp_path / "sdi_print_out.arrow"))
+    monkeypatch.setattr(app, "asset_group_classifiers", ClassifierCache(app.ASSET_GROUP_OVERRIDES))
+    monkeypatch.setattr(app.dataset_cache, "db_path", source_db)
+    app.dataset_cache.invalidate()
+    yield source_db
+    app.dataset_cache.invalidate()
+    pool.close_all()
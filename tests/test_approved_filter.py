@@ -0,0 +1,37 @@
+import sqlite3
+
+import app
+import SDI_process_database as loader
+from conftest import insert_rows
+
+
+def _approved(values):
+    conn = sqlite3.connect(":memory:")
+    conn.execute('CREATE TABLE sdi_dataset ("Building", "Approved", "QR Code")')
+    conn.executemany('INSERT INTO sdi_dataset VALUES (?, ?, ?)',
+                     [("100", value, i) for i, value in enumerate(values)])
+    sql, params = app.build_approved_assets_query(conn, "sdi_dataset", "100", columns=["QR Code"])
+    return [values[row[0]] for row in conn.execute(sql + ' ORDER BY "QR Code"', params)]
+
+
+def test_approved_matches_the_former_text_comparison():
+    # df["Approved"].astype(str) == "1" kept integer 1 and text '1' only.
+    values = [1, "1", 1.0, " 1", "1.0", "true", 0, "0", None]
+    assert _approved(values) == [1, "1"]
+
+
+def test_loader_and_app_agree_on_approved_rows(source_db):
+    values = [1, "1", 1.0, " 1", "1.0", "true", 0, "0", None]
+    conn = sqlite3.connect(source_db, isolation_level=None)
+    for table_name in loader.SOURCE_TABLES:
+        insert_rows(conn, table_name, [{"QR Code": i, "Building": "100", "Approved": v} for i, v in enumerate(values)])
+    loader.ensure_change_tracking(conn)
+    loader.full_load(conn)
+
+    combined = loader.load_combined(conn, keys=True)[loader.KEY_COLS].values.tolist()
+    from_app = []
+    for table_name in app.SDI_SOURCE_TABLES:
+        sql, params = app.build_approved_assets_query(conn, table_name, columns=[], row_keys=True)
+        from_app += [list(row) for row in conn.execute(sql + " ORDER BY rowid", params)]
+    assert combined == from_app
+    assert len(combined) == 2 * len(loader.SOURCE_TABLES)
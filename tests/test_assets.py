@@ -0,0 +1,49 @@
+import os
+import re
+import shutil
+
+import sdi_assets
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "static")
+
+
+def test_build_assets_on_the_committed_static_tree(tmp_path):
+    static_dir = tmp_path / "static"
+    shutil.copytree(STATIC_DIR, static_dir, ignore=shutil.ignore_patterns(sdi_assets.DIST_DIR))
+
+    manifest = sdi_assets.build_assets(str(static_dir))
+
+    assert set(manifest) == {*sdi_assets.BUNDLES, *sdi_assets.FILES}
+    for path in manifest.values():
+        assert (static_dir / path).is_file()
+    # The icon fonts referenced from vendor.css are copied next to the bundle.
+    css = (static_dir / manifest["vendor.css"]).read_text(encoding="utf-8")
+    fonts = re.findall(r'url\("(files/[^"]+)"\)', css)
+    assert fonts
+    for font in fonts:
+        assert (static_dir / sdi_assets.DIST_DIR / font).is_file()
+
+
+def test_ensure_assets_builds_only_when_sources_changed(tmp_path, monkeypatch):
+    static_dir = tmp_path / "static"
+    (static_dir / "vendor").mkdir(parents=True)
+    (static_dir / "vendor" / "lib.js").write_text("var a = 1;")
+    (static_dir / "style.css").write_text("body { margin : 0 }")
+    monkeypatch.setattr(sdi_assets, "BUNDLES", {"vendor.js": ["vendor/lib.js"], "style.css": ["style.css"]})
+    monkeypatch.setattr(sdi_assets, "FILES", [])
+
+    first = sdi_assets.ensure_assets(str(static_dir))
+    assert set(first) == {"vendor.js", "style.css"}
+    manifest = static_dir / sdi_assets.DIST_DIR / sdi_assets.MANIFEST_NAME
+    built = manifest.stat().st_mtime_ns
+    assert sdi_assets.ensure_assets(str(static_dir)) == first
+    assert manifest.stat().st_mtime_ns == built
+
+    source = static_dir / "vendor" / "lib.js"
+    source.write_text("var a = 2;")
+    os.utime(source, ns=(built + 10**9, built + 10**9))
+    assert sdi_assets.ensure_assets(str(static_dir))["vendor.js"] != first["vendor.js"]
+
+    source.unlink()
+    assert sdi_assets.ensure_assets(str(static_dir)) is None
+    assert not manifest.exists()
@@ -0,0 +1,56 @@
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+
+import pandas as pd
+
+import app
+from sdi_classification import ClassifierCache
+from sdi_db import ConnectionPool
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _overrides_from_env(value: str) -> dict:
+    """app.ASSET_GROUP_OVERRIDES as a fresh interpreter builds it with SDI_ASSET_GROUP_OVERRIDES=value."""
+    env = dict(os.environ, SDI_ASSET_GROUP_OVERRIDES=value, SDI_REQUEST_LOG="off")
+    out = subprocess.run([sys.executable, "-c", "import app, json; print(json.dumps(app.ASSET_GROUP_OVERRIDES))"],
+                         cwd=REPO_DIR, env=env, capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def test_export_classifies_each_row_of_a_reindexed_frame(tmp_path, monkeypatch):
+    overrides = _overrides_from_env(json.dumps({"Boiler": "ME.99.000.0001"}))
+    assert overrides == {"panels": "EL.21.306.4067", "Boiler": "ME.99.000.0001"}
+
+    db_path = str(tmp_path / "QR_codes.db")
+    conn = sqlite3.connect(db_path)
+    conn.execute('CREATE TABLE Asset_Group (Name, "Full Classification")')
+    conn.executemany("INSERT INTO Asset_Group VALUES (?, ?)", [
+        ("Pump", "ME.21.101.1001"), ("Fan", "ME.21.102.1002"),
+        ("Boiler", "ME.21.103.1003"), ("Panels", "EL.00.000.0000"),
+    ])
+    conn.commit()
+    conn.close()
+    monkeypatch.setattr(app, "db_pool", ConnectionPool(db_path))
+    monkeypatch.setattr(app, "asset_group_classifiers", ClassifierCache(overrides))
+
+    # Filtered and sorted frames keep their original labels; the groups must follow the rows, not the labels.
+    df = pd.DataFrame(
+        {"QR Code": ["7", "3", "12", "5", "9"],
+         "Asset Group": ["Fan", " Pump ", "PANELS", "boiler", "Heater"]},
+        index=[7, 3, 12, 5, 9],
+    ).sort_values("QR Code")
+
+    result = app._classify_asset_groups(df)
+
+    assert list(result.index) == list(df.index)
+    assert result["Asset Group"].to_dict() == {
+        7: "ME.21.102.1002",   # from the table
+        3: "ME.21.101.1001",   # matched after stripping the spaces
+        12: "EL.21.306.4067",  # built-in override, case-insensitive
+        5: "ME.99.000.0001",   # SDI_ASSET_GROUP_OVERRIDES wins over the table
+        9: "Heater",           # unknown names are kept
+    }
@@ -0,0 +1,45 @@
+import sqlite3
+
+import pytest
+from conftest import insert_rows
+
+import app
+
+PAGE = "/api/unpackaged?building_code=100&start=0&length=10"
+
+
+@pytest.fixture
+def client(app_db):
+    conn = sqlite3.connect(app_db)
+    insert_rows(conn, "sdi_dataset", [
+        {"QR Code": str(100 + i), "Building": "100", "Asset Group": "Pump", "Approved": "1"} for i in range(25)
+    ])
+    conn.commit()
+    conn.close()
+    client = app.app.test_client()
+    # The first request records the app's own tables in the database; validators settle after it.
+    assert client.get(PAGE + "&draw=1").status_code == 200
+    return client
+
+
+def test_datatables_page_revalidates_across_draws(client):
+    first = client.get(PAGE + "&draw=1&_=1700000000001")
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    assert first.get_json()["draw"] == 1
+
+    # DataTables bumps "draw" and jQuery "_" on every reload; the page itself is unchanged.
+    again = client.get(PAGE + "&draw=2&_=1700000000002", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.headers["ETag"] == etag
+    assert "Accept-Encoding" in again.headers["Vary"]
+    assert again.get_data() == b""
+
+
+def test_another_page_is_not_served_from_the_validator(client):
+    etag = client.get(PAGE + "&draw=1").headers["ETag"]
+
+    next_page = client.get(PAGE.replace("start=0", "start=10") + "&draw=2", headers={"If-None-Match": etag})
+    assert next_page.status_code == 200
+    assert next_page.headers["ETag"] != etag
+    assert next_page.get_json()["data"][0][1] == "110"
@@ -0,0 +1,73 @@
+import sqlite3
+
+import pandas as pd
+import pytest
+
+import SDI_process_database as loader
+from conftest import insert_rows
+
+
+@pytest.fixture
+def conn(source_db):
+    conn = sqlite3.connect(source_db, isolation_level=None)
+    insert_rows(conn, "sdi_dataset", [
+        {"QR Code": 1, "Building": "100", "Description": "Pump", "Approved": 1},
+        {"QR Code": 2, "Building": "100", "Description": "Fan", "Approved": 1},
+        {"QR Code": 3, "Building": "200", "Description": "Boiler", "Approved": 0},
+    ])
+    insert_rows(conn, "sdi_dataset_EL", [
+        {"QR Code": 10, "Building": "100", "UBC Asset Tag": "E-10", "Approved": "1"},
+        {"QR Code": 11, "Building": "200", "UBC Asset Tag": "E-11", "Approved": "1"},
+    ])
+    loader.ensure_change_tracking(conn)
+    loader.full_load(conn)
+    yield conn
+    conn.close()
+
+
+def _rebuilt(conn) -> pd.DataFrame:
+    loader.full_load(conn)
+    return loader.load_combined(conn, keys=True)
+
+
+def _apply_changes(conn):
+    insert_rows(conn, "sdi_dataset", [{"QR Code": 4, "Building": "300", "Description": "Chiller", "Approved": 1}])
+    conn.execute('UPDATE sdi_dataset SET "Description" = \'Pump 2\' WHERE "QR Code" = 1')
+    conn.execute('UPDATE sdi_dataset SET "Approved" = 1 WHERE "QR Code" = 3')
+    conn.execute('UPDATE sdi_dataset SET "Approved" = 0 WHERE "QR Code" = 2')
+    conn.execute('DELETE FROM sdi_dataset_EL WHERE "QR Code" = 10')
+    insert_rows(conn, "sdi_dataset_EL", [{"QR Code": 12, "Building": "100", "UBC Asset Tag": "E-12", "Approved": 1}])
+
+
+def test_incremental_load_matches_a_full_load(conn):
+    _apply_changes(conn)
+
+    touched = loader.incremental_load(conn)
+    incremental = loader.load_combined(conn, keys=True)
+
+    assert touched == 6
+    assert incremental[loader.KEY_COLS].values.tolist() == [
+        ["sdi_dataset", 1], ["sdi_dataset", 3], ["sdi_dataset", 4],
+        ["sdi_dataset_EL", 2], ["sdi_dataset_EL", 3],
+    ]
+    assert incremental.loc[0, "Description"] == "Pump 2"
+    assert incremental.loc[3, "UBC Tag"] == "E-11"
+    pd.testing.assert_frame_equal(incremental, _rebuilt(conn))
+
+
+def test_incremental_load_without_changes_keeps_the_rows(conn):
+    before = loader.load_combined(conn)
+
+    assert loader.incremental_load(conn) == 0
+    pd.testing.assert_frame_equal(loader.load_combined(conn), before)
+    assert loader.get_high_water_mark(conn) == loader._max_seq(conn)
+
+
+def test_changes_are_merged_once(conn):
+    _apply_changes(conn)
+    loader.incremental_load(conn)
+    merged = loader.load_combined(conn)
+
+    assert loader.incremental_load(conn) == 0
+    pd.testing.assert_frame_equal(loader.load_combined(conn), merged)
+    assert conn.execute(f"SELECT COUNT(*) FROM {loader.CHANGE_LOG_TABLE}").fetchone()[0] == 0
@@ -0,0 +1,74 @@
+import sqlite3
+
+from conftest import insert_rows
+
+import app
+
+
+def _asset(code, building, **values):
+    row = {"QR Code": code, "Building": building, "Description": f"Asset {code}",
+           "Asset Group": "Pump", "Attribute": "A", "UBC Tag": f"T{code}", "Approved": "1"}
+    row.update(values)
+    return row
+
+
+def _print_out(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute(
+            'SELECT "QR Code", "Building", "id_print_out", "print_out" FROM sdi_print_out ORDER BY "QR Code"'
+        ).fetchall()
+    finally:
+        conn.close()
+
+
+def test_batch_packages_each_requested_building(app_db):
+    conn = sqlite3.connect(app_db)
+    insert_rows(conn, "sdi_dataset", [
+        _asset("101", "100"), _asset("102", "100"), _asset("201", "200"),
+        _asset("301", "300"),                       # not requested
+        _asset("103", "100", Approved="0"),         # not approved
+    ])
+    insert_rows(conn, "sdi_dataset_EL", [_asset("202", "200", **{"UBC Asset Tag": "E202"})])
+    conn.commit()
+    conn.close()
+
+    result = app.create_sdi_packages(["200", " 100 ", "400"])
+
+    assert result["created"] == 2
+    assert result["rows"] == 4
+    packages = {item["building_code"]: item for item in result["packages"]}
+    assert sorted(packages) == ["100", "200", "400"]
+    assert packages["400"]["status"] == "skipped"
+    first, second = packages["100"], packages["200"]
+    assert (first["status"], first["rows"]) == ("created", 2)
+    assert (second["status"], second["rows"]) == ("created", 2)
+    assert first["package_id"] != second["package_id"]
+
+    assert _print_out(app_db) == [
+        ("101", "100", first["package_id"], "0"),
+        ("102", "100", first["package_id"], "0"),
+        ("201", "200", second["package_id"], "0"),
+        ("202", "200", second["package_id"], "0"),
+    ]
+    # Packaged assets leave the unpackaged set; the building that was not asked for stays.
+    assert app.build_unpackaged_dataset()["QR Code"].tolist() == ["301"]
+    assert sorted(app.get_package_ids()) == sorted([first["package_id"], second["package_id"]])
+
+
+def test_batch_skips_buildings_that_need_attention(app_db):
+    conn = sqlite3.connect(app_db)
+    insert_rows(conn, "sdi_dataset", [
+        _asset("101", "100"), _asset("102", "100", Attribute=" "),
+        _asset("201", "200"),
+    ])
+    conn.commit()
+    conn.close()
+
+    result = app.create_sdi_packages(["100", "200"])
+
+    packages = {item["building_code"]: item for item in result["packages"]}
+    assert packages["100"]["status"] == "skipped"
+    assert packages["100"]["message"] == app.MSG_REQUIRED_FIELDS
+    assert packages["200"]["status"] == "created"
+    assert [row[0] for row in _print_out(app_db)] == ["201"]
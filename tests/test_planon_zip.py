@@ -0,0 +1,69 @@
+import io
+import sqlite3
+import zipfile
+
+import pytest
+from conftest import insert_rows
+from openpyxl import load_workbook
+
+import app
+import planon_export
+from test_packaging import _asset
+
+
+@pytest.fixture
+def packages(app_db, monkeypatch):
+    """IDs of two packages, one per building, with the assets of each."""
+    # Two workbooks and two workers: the zip is rendered in the process pool.
+    monkeypatch.setattr(app, "PLANON_PROCESSES", 2)
+    conn = sqlite3.connect(app_db)
+    conn.execute('CREATE TABLE Asset_Group (Name, "Full Classification")')
+    conn.execute("INSERT INTO Asset_Group VALUES ('Pump', 'ME.21.101.1001')")
+    insert_rows(conn, "sdi_dataset", [_asset("101", "100"), _asset("102", "100"), _asset("201", "200")])
+    insert_rows(conn, "sdi_dataset_EL", [_asset("202", "200", **{"Asset Group": "panels"})])
+    conn.commit()
+    conn.close()
+    result = app.create_sdi_packages(["100", "200"])
+    yield [item["package_id"] for item in result["packages"]]
+    planon_export.shutdown_pool()
+
+
+def _sheet_values(data: bytes) -> list:
+    sheet = load_workbook(io.BytesIO(data), read_only=True).active
+    return [list(row) for row in sheet.iter_rows(values_only=True)]
+
+
+def test_each_workbook_of_the_zip_matches_its_single_export(packages):
+    result = app.generate_planon_exports("", packages)
+
+    assert result["filename"].endswith(".zip")
+    assert result["rows"] == 4
+    with zipfile.ZipFile(io.BytesIO(result["data"])) as archive:
+        workbooks = {name: archive.read(name) for name in archive.namelist()}
+
+    # The zip flagged every asset as exported, so the single exports need force_export.
+    singles = [app.generate_planon_export("", package_id, force_export=True) for package_id in packages]
+    assert sorted(workbooks) == sorted(single["filename"] for single in singles)
+    for single in singles:
+        assert _sheet_values(workbooks[single["filename"]]) == _sheet_values(single["data"])
+
+
+def test_zip_flags_the_exported_assets(packages):
+    app.generate_planon_exports("", packages)
+
+    conn = sqlite3.connect(app.DB_PATH)
+    flags = conn.execute('SELECT DISTINCT "print_out" FROM sdi_print_out').fetchall()
+    conn.close()
+    assert flags == [("1",)]
+    with pytest.raises(app.ExportError) as error:
+        app.generate_planon_exports("", packages)
+    assert error.value.category == "planon_confirmation"
+
+
+def test_null_values_are_written_as_empty_cells(packages):
+    # "Model", "Serial Number"... are not in the test tables, so they are null in every row.
+    data = app.generate_planon_export("", packages[0])["data"]
+
+    cells = [value for row in _sheet_values(data) for value in row]
+    assert "101" in cells
+    assert not [value for value in cells if value in ("<NA>", "nan", "None")]
@@ -0,0 +1,57 @@
+import sqlite3
+
+import pytest
+
+import app
+import SDI_process_database as loader
+from conftest import insert_rows
+from sdi_snapshot import source_signature, write_snapshot
+
+pytest.importorskip("pyarrow")
+
+ASSET_COLS = app.ROW_KEY_COLS + app.SOURCE_COLS
+
+
+def _loaded_db(source_db):
+    conn = sqlite3.connect(source_db, isolation_level=None)
+    insert_rows(conn, "sdi_dataset", [
+        {"QR Code": 1, "Building": "100", "Description": "Pump", "Approved": 1},
+        {"QR Code": 2, "Building": "100", "Description": "Fan", "Approved": 0},
+    ])
+    insert_rows(conn, "sdi_dataset_EL", [{"QR Code": 3, "Building": "200", "UBC Asset Tag": "E-1", "Approved": "1"}])
+    loader.ensure_change_tracking(conn)
+    loader.full_load(conn)
+    return conn
+
+
+def test_app_rewrites_a_snapshot_written_by_the_loader(source_db, tmp_path):
+    conn = _loaded_db(source_db)
+    path = str(tmp_path / "sdi_dataset.arrow")
+    loader.write_combined_snapshot(conn, path)
+
+    df = app._snapshot_frame(conn, path, "approved_assets", list(app.SDI_SOURCE_TABLES),
+                             app._read_approved_assets, ASSET_COLS)
+
+    assert df is not None and list(df.columns) == ASSET_COLS
+    assert sorted(df["QR Code"].astype(int)) == [1, 3]
+
+
+def test_loader_snapshot_keeps_the_row_keys(source_db, tmp_path):
+    conn = _loaded_db(source_db)
+    path = str(tmp_path / "combined.arrow")
+    loader.write_combined_snapshot(conn, path)
+
+    df = app.read_snapshot(path, kind=loader.COMBINED_TABLE)
+
+    assert list(df.columns) == loader.KEY_COLS + loader.MASTER_COLS
+    assert df[loader.KEY_COLS].values.tolist() == [["sdi_dataset", 1], ["sdi_dataset_EL", 1]]
+
+
+def test_snapshot_without_the_key_columns_falls_back_to_sqlite(source_db, tmp_path):
+    conn = _loaded_db(source_db)
+    path = str(tmp_path / "sdi_dataset.arrow")
+    tables = list(app.SDI_SOURCE_TABLES)
+    keyless = app._read_approved_assets(conn).drop(columns=app.ROW_KEY_COLS)
+    write_snapshot(keyless, path, source_signature(conn, tables), "approved_assets")
+
+    assert app._snapshot_frame(conn, path, "approved_assets", tables, lambda c: keyless, ASSET_COLS) is None
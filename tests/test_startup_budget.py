@@ -0,0 +1,26 @@
+import os
+import statistics
+import sys
+
+BENCHMARKS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks")
+sys.path.insert(0, BENCHMARKS_DIR)
+
+from startup_budget import LAZY_MODULES, run_once  # noqa: E402
+
+# benchmarks/startup_budget.py enforces 450 ms on the build box; CI machines are
+# noisier, so the test allows more before it fails.
+BUDGET_MS = float(os.getenv("SDI_STARTUP_BUDGET_MS", "650"))
+RUNS = 3
+
+
+def test_cold_import_of_app_stays_within_budget_and_lazy():
+    timings, loaded = [], set()
+    for _ in range(RUNS):
+        # Fresh interpreter each time: python -X importtime -c "import app".
+        result, _ = run_once("app", LAZY_MODULES)
+        timings.append(result["ms"])
+        loaded.update(result["loaded"])
+
+    assert not loaded, f"imported by app but meant to be lazy: {sorted(loaded)}"
+    median = statistics.median(timings)
+    assert median <= BUDGET_MS, f"median cold import {median:.0f} ms is over the {BUDGET_MS:.0f} ms budget"
@@ -0,0 +1,53 @@
+## /home/developer/SDI_process/wsgi.py
+"""Production entry point:  gunicorn -c gunicorn.conf.py wsgi:app
+
+Importing this module builds the app with pandas, openpyxl, the Planon
+template and the dataset caches already loaded. With ``preload_app`` (see
+gunicorn.conf.py) that happens once in the gunicorn master, and the forked
+workers share those memory pages copy-on-write instead of each loading them.
+"""
+
+import gc
+import os
+import time
+
+
+def warm_up(sdi_app):
+    """Fill the caches the dashboard and the exports read first (the all-buildings views)."""
+    start = time.perf_counter()
+    import openpyxl  # noqa: F401  (only imported by the exports otherwise)
+    try:
+        sdi_app.load_template(sdi_app.TEMPLATE_PATH)
+    except FileNotFoundError as e:
+        print(f"[WARNING] in warm_up: {repr(e)}")
+    # Same values as the routes (building_code="" for all buildings) so the cache keys match.
+    with sdi_app.app.test_request_context():
+        sdi_app.get_all_buildings()
+        sdi_app.get_package_ids(building_code="")
+        sdi_app.build_unpackaged_dataset("")
+        sdi_app.build_packaged_dataset(building_code="")
+        with sdi_app.db_pool.connection() as conn:
+            sdi_app.asset_group_classifiers.get(conn)
+    # Connections are never shared with the workers; close the parent's before they fork.
+    sdi_app.db_pool.close_all()
+    stats = sdi_app.dataset_cache.stats()
+    print(f"[WARMUP] {stats['entries']} cache entries, {stats['bytes'] / 2**20:.1f} MB "
+          f"in {time.perf_counter() - start:.2f}s")
+
+
+def create_app(warm: bool = True):
+    """The Flask app with the indexes checked, the static bundles built and, if ``warm``, the shared caches filled."""
+    import app as sdi_app
+
+    sdi_app.init_db_indexes()
+    sdi_app.ensure_assets(sdi_app.STATIC_DIR)
+    if warm:
+        warm_up(sdi_app)
+    return sdi_app.app
+
+
+app = create_app(warm=os.getenv("SDI_WARM_CACHES", "1") != "0")
+
+# Move everything loaded so far out of the collector's reach: a collection in a
+# worker would otherwise write to (and so copy) every shared page it visits.
+gc.freeze()